@@ -0,0 +1,106 @@
+"""
+Parity, latency and memory check for the CPG inference backends.
+
+Each backend runs in its own subprocess so resident memory is measured in
+isolation. Outputs are compared against the fp32 torch backend sentence by
+sentence, and BLEU/ROUGE-L are reported both against the source passage and
+against the fp32 paraphrase.
+
+Usage:
+    python -m benchmarks.backend_parity --backends torch int8 onnx
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+
+def run_backend(backend, input_path, export_dir):
+    from models.cpg_model import CustomParaphraseGenerator
+    from models.memory import current_rss, peak_rss
+
+    with open(input_path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    rss_before = current_rss()
+    cpg = CustomParaphraseGenerator(backend=backend, export_dir=export_dir)
+    rss_loaded = current_rss()
+
+    sentences = cpg._split_sentences(text)
+    start = time.time()
+    outputs = cpg.paraphrase_sentences(sentences)
+    latency = time.time() - start
+
+    return {
+        "backend": backend,
+        "latency": latency,
+        "model_rss_mb": rss_loaded - rss_before,
+        # ru_maxrss of this worker process, covering loading and generation
+        "peak_rss_mb": peak_rss(),
+        "sentences": outputs
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPG backend parity check")
+    parser.add_argument("--input", default="Data/test_passage.txt")
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--export-dir", default=None)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.input, args.export_dir)))
+        return
+
+    from evaluation.metrics import ParaphraseEvaluator
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    results = {}
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        command = [sys.executable, "-m", "benchmarks.backend_parity",
+                   "--input", args.input, "--worker", backend]
+        if args.export_dir:
+            command += ["--export-dir", args.export_dir]
+
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{backend}: failed\n{completed.stderr.strip().splitlines()[-1]}")
+            continue
+        results[backend] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    if "torch" not in results:
+        print("fp32 reference run failed; nothing to compare against")
+        return
+
+    evaluator = ParaphraseEvaluator()
+    reference = results["torch"]
+    reference_text = " ".join(reference["sentences"])
+
+    print("\n" + "=" * 88)
+    print(f"{'Backend':<8} {'Latency':<10} {'Speedup':<9} {'Model MB':<10} {'Peak MB':<9} "
+          f"{'Exact':<8} {'BLEU':<8} {'ROUGE-L':<9} {'BLEU vs fp32'}")
+    print("-" * 88)
+
+    for backend, result in results.items():
+        output = " ".join(result["sentences"])
+        exact = sum(a == b for a, b in zip(reference["sentences"], result["sentences"]))
+        rouge = evaluator.calculate_rouge(text, output)
+
+        print(f"{backend:<8} {result['latency']:<10.2f} "
+              f"{reference['latency'] / result['latency']:<9.2f} "
+              f"{result['model_rss_mb']:<10.0f} "
+              f"{result['peak_rss_mb']:<9.0f} "
+              f"{exact}/{len(result['sentences']):<6} "
+              f"{evaluator.calculate_bleu(text, output):<8.4f} "
+              f"{rouge['rougeL']:<9.4f} "
+              f"{evaluator.calculate_bleu(reference_text, output):.4f}")
+
+    print("=" * 88)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compare the per-sentence generate loop against batched generation.
+
+Usage:
+    python -m benchmarks.batch_generation --batch-sizes 4 8 16
+"""
+import argparse
+import time
+
+from models.cpg_model import CustomParaphraseGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPG batched generation throughput")
+    parser.add_argument("--input", default="Data/test_passage.txt")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    # Fixed beam search, so batch size 1 is the original per-sentence path
+    cpg = CustomParaphraseGenerator(decoding="beam")
+    sentences = cpg._split_sentences(text)
+    print(f"\n{len(sentences)} sentences from {args.input}")
+
+    start = time.time()
+    reference = cpg.paraphrase_sentences(sentences, batch_size=1)
+    baseline = time.time() - start
+
+    print("=" * 60)
+    print(f"{'Batch size':<12} {'Time (s)':<12} {'Sent/s':<12} {'Speedup':<10} {'Match'}")
+    print("-" * 60)
+    print(f"{1:<12} {baseline:<12.2f} {len(sentences) / baseline:<12.2f} {1.0:<10.2f} -")
+
+    for batch_size in args.batch_sizes:
+        start = time.time()
+        outputs = cpg.paraphrase_sentences(sentences, batch_size=batch_size)
+        elapsed = time.time() - start
+
+        mismatches = sum(1 for a, b in zip(reference, outputs) if a != b)
+        match = "yes" if mismatches == 0 else f"{mismatches} differ"
+        print(f"{batch_size:<12} {elapsed:<12.2f} {len(sentences) / elapsed:<12.2f} "
+              f"{baseline / elapsed:<10.2f} {match}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Parity and speed of the vectorized corpus metrics against the per-pair path.
+
+Builds synthetic (reference, candidate) pairs from the test passage by
+deleting, inserting and shuffling words, then scores them with both
+ParaphraseEvaluator.calculate_bleu/calculate_rouge and CorpusEvaluator.
+
+Usage:
+    python -m benchmarks.corpus_metrics --pairs 5000 --workers 4
+"""
+import argparse
+import random
+import time
+
+from evaluation.corpus_metrics import CorpusEvaluator
+from evaluation.metrics import ParaphraseEvaluator
+
+METRICS = ['bleu', 'rouge1', 'rouge2', 'rougeL']
+
+
+def make_pairs(words, count, seed=0):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        start = rng.randrange(len(words))
+        reference = words[start:start + rng.randint(1, 40)]
+        candidate = list(reference)
+
+        for _ in range(rng.randint(0, 5)):
+            op = rng.random()
+            if op < 0.3 and candidate:
+                candidate.pop(rng.randrange(len(candidate)))
+            elif op < 0.6:
+                candidate.insert(rng.randrange(len(candidate) + 1), rng.choice(words))
+            else:
+                rng.shuffle(candidate)
+
+        pairs.append((" ".join(reference), " ".join(candidate)))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus BLEU/ROUGE parity and throughput")
+    parser.add_argument("--input", default="Data/test_passage.txt")
+    parser.add_argument("--pairs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        pairs = make_pairs(f.read().split(), args.pairs)
+
+    evaluator = ParaphraseEvaluator()
+
+    start = time.time()
+    expected = []
+    for reference, candidate in pairs:
+        metrics = {'bleu': evaluator.calculate_bleu(reference, candidate)}
+        metrics.update(evaluator.calculate_rouge(reference, candidate))
+        expected.append(metrics)
+    per_pair_time = time.time() - start
+
+    start = time.time()
+    results = CorpusEvaluator().evaluate(pairs, num_workers=args.workers)
+    corpus_time = time.time() - start
+
+    mismatches = {metric: 0 for metric in METRICS}
+    for want, got in zip(expected, results):
+        for metric in METRICS:
+            if abs(want[metric] - got[metric]) > args.tolerance:
+                mismatches[metric] += 1
+
+    print(f"\n{len(pairs)} pairs")
+    print(f"Per-pair:  {per_pair_time:.2f}s ({len(pairs) / per_pair_time:.0f} pairs/s)")
+    print(f"Corpus:    {corpus_time:.2f}s ({len(pairs) / corpus_time:.0f} pairs/s, "
+          f"{per_pair_time / corpus_time:.2f}x)")
+    print("Mismatches: " + ", ".join(f"{m}={n}" for m, n in mismatches.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Exercise AsyncLLMParaphraser against the local mock OpenAI server.
+
+Sends the test passage's paragraphs concurrently and reports throughput,
+with a fraction of requests rejected by the server to exercise retries.
+
+Usage:
+    python -m benchmarks.llm_concurrency --requests 50 --concurrency 8
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.mock_openai_server import start_mock_server
+from models.llm_baseline import AsyncLLMParaphraser
+
+
+async def _run(llm, paragraphs):
+    try:
+        return await llm.paraphrase_many(paragraphs)
+    finally:
+        await llm.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async LLM baseline against a mock server")
+    parser.add_argument("--input", default="Data/test_passage.txt")
+    parser.add_argument("--base-url", default=None, help="Use an already running server")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=50.0)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        paragraphs = [p.strip() for p in f.read().split("\n") if p.strip()]
+    paragraphs = (paragraphs * (args.requests // len(paragraphs) + 1))[:args.requests]
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_mock_server(latency=args.latency, failure_rate=args.failure_rate)
+
+    llm = AsyncLLMParaphraser(
+        api_key="mock",
+        base_url=base_url,
+        max_concurrency=args.concurrency,
+        requests_per_second=args.rps,
+        backoff_base=0.05
+    )
+
+    start = time.time()
+    outputs = asyncio.run(_run(llm, paragraphs))
+    elapsed = time.time() - start
+
+    if server is not None:
+        server.shutdown()
+
+    echoed = sum(out == p for out, p in zip(outputs, paragraphs))
+    print(f"{len(outputs)} requests in {elapsed:.2f}s "
+          f"({len(outputs) / elapsed:.2f} req/s, {echoed} echoed correctly)")
+    print(f"Sequential lower bound at {args.latency:.2f}s each: {args.latency * len(outputs):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
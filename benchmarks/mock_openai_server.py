@@ -0,0 +1,104 @@
+"""
+Local mock of the OpenAI chat completions endpoint.
+
+Echoes the paragraph from the user prompt back as the "paraphrase" after a
+configurable delay, and can reject a fraction of requests with HTTP 429 to
+exercise client retries. No API key or network access is needed.
+
+Usage:
+    python -m benchmarks.mock_openai_server --port 8001 --latency 0.5
+    OPENAI_API_KEY=mock python -m benchmarks.llm_concurrency --base-url http://127.0.0.1:8001/v1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _make_handler(latency, failure_rate):
+    class MockOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            if not self.path.endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+
+            if random.random() < failure_rate:
+                self._send_json(429, {"error": {"message": "rate limited", "type": "rate_limit"}})
+                return
+
+            time.sleep(latency)
+
+            prompt = request["messages"][-1]["content"]
+            paragraph = prompt.split("Paragraph:", 1)[-1].strip()
+
+            self._send_json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": paragraph},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": len(paragraph.split()),
+                    "total_tokens": len(prompt.split()) + len(paragraph.split())
+                }
+            })
+
+    return MockOpenAIHandler
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0):
+    """
+    Start the mock server in a daemon thread.
+
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(latency, failure_rate))
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(args.latency, args.failure_rate))
+    print(f"Mock OpenAI server on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Shared preprocessing versus per-stage tokenization on long documents.
+
+Documents are built by repeating Data/test_passage.txt. For every document
+and a shuffled "paraphrase" of it, the repeated path tokenizes the way each
+stage used to: NLTK sent_tokenize for generation, str.split for BLEU, length
+ratio and error analysis, and rouge_score's stemming tokenizer for ROUGE.
+The shared path asks one TextPreprocessor for the same segmentation and
+tokens, so each pass runs once per text. The first call of each path is
+reported separately because it includes loading the punkt model.
+
+Segmentation is also checked on Data/segmentation_fixture.json, a set of
+texts with their expected sentence boundaries, and against live punkt output
+when the model is installed. Without punkt, the long documents are
+segmented with split_sentences on both paths and no parity is reported.
+
+Usage:
+    python -m benchmarks.preprocessing --repeats 1 10 50 --iterations 5
+"""
+import argparse
+import json
+import random
+import time
+
+from inference.preprocessing import TextPreprocessor, split_sentences
+
+
+def _punkt_tokenizer():
+    """sent_tokenize, or None when the punkt model is not installed."""
+    from nltk.tokenize import sent_tokenize
+    try:
+        sent_tokenize("Check that punkt is available. It may not be.")
+    except LookupError:
+        return None
+    return sent_tokenize
+
+
+def check_fixture(path, sent_tokenize):
+    """Print split_sentences mismatches against the fixture and, if available, punkt."""
+    with open(path, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    fixture_mismatches, punkt_mismatches = 0, 0
+    for case in cases:
+        sentences = split_sentences(case["text"])
+        if sentences != case["sentences"]:
+            fixture_mismatches += 1
+            print(f"  fixture mismatch: {case['text']!r} -> {sentences}")
+        if sent_tokenize is not None and sentences != sent_tokenize(case["text"]):
+            punkt_mismatches += 1
+            print(f"  punkt mismatch:   {case['text']!r} -> {sentences} vs {sent_tokenize(case['text'])}")
+
+    print(f"Fixture: {len(cases) - fixture_mismatches}/{len(cases)} texts segmented as expected")
+    if sent_tokenize is None:
+        print("Punkt: unavailable")
+    else:
+        print(f"Punkt: {len(cases) - punkt_mismatches}/{len(cases)} texts segmented identically")
+
+
+def repeated_pass(document, paraphrase, sent_tokenize, rouge_tokenizer):
+    sentences = sent_tokenize(document)
+    # BLEU
+    document.split(), paraphrase.split()
+    # ROUGE
+    rouge_tokenizer.tokenize(document), rouge_tokenizer.tokenize(paraphrase)
+    # Length ratio
+    len(document.split()), len(paraphrase.split())
+    # Error analysis
+    document.split(), paraphrase.split()
+    return sentences
+
+
+def shared_pass(document, paraphrase, preprocessor):
+    original, candidate = preprocessor.process(document), preprocessor.process(paraphrase)
+    sentences = original.sentences
+    for _ in range(3):
+        # BLEU, length ratio and error analysis all read the cached words
+        original.words, candidate.words
+    original.rouge_tokens, candidate.rouge_tokens
+    return sentences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared text preprocessing benchmark")
+    parser.add_argument("--input", default="Data/test_passage.txt")
+    parser.add_argument("--fixture", default="Data/segmentation_fixture.json")
+    parser.add_argument("--repeats", type=int, nargs="+", default=[1, 10, 50],
+                        help="Document sizes, in copies of the input passage")
+    parser.add_argument("--iterations", type=int, default=5,
+                        help="Times each document is preprocessed, as in generate + evaluate runs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from rouge_score.tokenizers import DefaultTokenizer
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        passage = f.read()
+
+    punkt = _punkt_tokenizer()
+    check_fixture(args.fixture, punkt)
+    if punkt is None:
+        print("NLTK punkt is not installed; the repeated path uses split_sentences for segmentation")
+    sent_tokenize = punkt or split_sentences
+
+    rng = random.Random(args.seed)
+    rows = []
+    for repeats in args.repeats:
+        document = "\n".join([passage] * repeats)
+        words = document.split()
+        rng.shuffle(words)
+        paraphrase = " ".join(words)
+
+        # A fresh tokenizer per size, like a new RougeScorer per evaluator
+        rouge_tokenizer = DefaultTokenizer(use_stemmer=True)
+        start = time.perf_counter()
+        repeated_pass(document, paraphrase, sent_tokenize, rouge_tokenizer)
+        repeated_first = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            expected = repeated_pass(document, paraphrase, sent_tokenize, rouge_tokenizer)
+        repeated = (time.perf_counter() - start) / args.iterations
+
+        preprocessor = TextPreprocessor()
+        start = time.perf_counter()
+        shared_pass(document, paraphrase, preprocessor)
+        shared_first = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            sentences = shared_pass(document, paraphrase, preprocessor)
+        shared = (time.perf_counter() - start) / args.iterations
+
+        agreement = None
+        if punkt is not None:
+            agreement = len(set(sentences) & set(expected)) / max(len(set(expected)), 1)
+        rows.append((len(words), repeated_first, repeated, shared_first, shared, agreement))
+
+    print("\n" + "=" * 88)
+    print(f"{'Words':<9} {'Repeated 1st':<14} {'Repeated':<11} {'Shared 1st':<12} {'Shared':<11} "
+          f"{'Speedup':<9} {'Same sents'}")
+    print("-" * 88)
+    for words, repeated_first, repeated, shared_first, shared, agreement in rows:
+        same = "punkt unavailable" if agreement is None else f"{agreement:.1%}"
+        print(f"{words:<9} {repeated_first * 1000:<14.1f} {repeated * 1000:<11.2f} "
+              f"{shared_first * 1000:<12.1f} {shared * 1000:<11.3f} "
+              f"{repeated_first / max(shared_first, 1e-9):<9.1f} {same}")
+    print("=" * 88)
+    print("Times in ms per document. Speedup compares first passes; later shared passes are cache hits.")
+    print("'Same sents' is the share of sentences segmented identically to punkt")
+
+
+if __name__ == "__main__":
+    main()
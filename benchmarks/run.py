@@ -0,0 +1,289 @@
+"""
+Reproducible latency, throughput and quality benchmark suite.
+
+Workloads are built from Data/test_passage.txt: the real passage sentences
+plus synthetic sets of short and long sentences at several sizes, sampled
+with a fixed seed. Each case is run with warm-up iterations and repeated;
+results report latency percentiles and sentences/sec and are written as JSON
+keyed by target, workload and configuration so two runs can be diffed.
+
+Usage:
+    python -m benchmarks.run --targets cpg llm metrics --output bench.json
+    python -m benchmarks.run --batch-sizes 1 8 16 --num-beams 1 5 --threads 4 8
+    python -m benchmarks.run --output new.json --compare bench.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from inference.preprocessing import split_sentences
+from models.memory import peak_rss
+
+
+def summarize(times, items):
+    """Latency percentiles (seconds) and throughput for repeated runs."""
+    times = np.asarray(times)
+    median = float(np.median(times))
+    return {
+        "repeats": len(times),
+        "mean": float(times.mean()),
+        "min": float(times.min()),
+        "max": float(times.max()),
+        "p50": median,
+        "p90": float(np.percentile(times, 90)),
+        "p99": float(np.percentile(times, 99)),
+        "items": items,
+        "items_per_sec": items / median if median > 0 else float("inf")
+    }
+
+
+def measure(fn, warmup, repeats):
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def build_workloads(sentences, sizes, seed):
+    """Real passage sentences plus seeded synthetic short/long sentence sets."""
+    rng = random.Random(seed)
+    lengths = sorted(len(s.split()) for s in sentences)
+    median = lengths[len(lengths) // 2]
+
+    short = [s for s in sentences if len(s.split()) <= median]
+    workloads = {"real": list(sentences)}
+    for size in sizes:
+        workloads[f"short-{size}"] = [rng.choice(short) for _ in range(size)]
+        workloads[f"long-{size}"] = [
+            " ".join(rng.sample(sentences, 3)).replace(". ", "; ") for _ in range(size)
+        ]
+    return workloads
+
+
+def _case(target, workload, config, stats):
+    key = "|".join([target, workload] + [f"{k}={v}" for k, v in sorted(config.items())])
+    # ru_maxrss never decreases, so this is the process peak up to and including this case
+    stats.setdefault("peak_rss_mb", peak_rss())
+    return {"key": key, "target": target, "workload": workload, "config": config, **stats}
+
+
+def bench_cpg(args, workloads):
+    import torch
+    from models.cpg_model import CustomParaphraseGenerator
+    from models.decoding import DecodingController
+
+    cpg = CustomParaphraseGenerator(low_memory=args.low_memory, memory_budget_mb=args.memory_budget_mb)
+    default_threads = torch.get_num_threads()
+
+    # Adaptive decoding uses its own beam schedule, so num_beams is only swept for beam
+    modes = [("beam", num_beams) for num_beams in args.num_beams if "beam" in args.decoding]
+    if "adaptive" in args.decoding:
+        modes.append(("adaptive", None))
+
+    cases = []
+    sweep = itertools.product(args.batch_sizes, modes, args.max_lengths, args.threads)
+    for batch_size, (decoding, num_beams), max_length, threads in sweep:
+        torch.set_num_threads(threads or default_threads)
+        if num_beams is not None:
+            cpg.num_beams = num_beams
+        cpg.max_length = max_length
+        cpg.decoding = DecodingController() if decoding == "adaptive" else None
+
+        for name, sentences in workloads.items():
+            times = measure(lambda: cpg.paraphrase_sentences(sentences, batch_size=batch_size),
+                            args.warmup, args.repeats)
+            config = {"batch_size": batch_size, "max_length": max_length,
+                      "threads": threads or default_threads, "decoding": decoding}
+            if num_beams is not None:
+                config["num_beams"] = num_beams
+            if args.low_memory:
+                config["low_memory"] = True
+            stats = summarize(times, len(sentences))
+            stats["token_stats"] = dict(cpg.last_stats)
+            cases.append(_case("cpg", name, config, stats))
+            print(f"cpg {name:<10} {config} p50={cases[-1]['p50']:.3f}s "
+                  f"peak_rss={cases[-1]['peak_rss_mb']:.0f}MB")
+
+    torch.set_num_threads(default_threads)
+    return cases
+
+
+def bench_llm(args, workloads):
+    from benchmarks.mock_openai_server import start_mock_server
+    from models.llm_baseline import AsyncLLMParaphraser
+
+    server, base_url = start_mock_server(latency=args.llm_latency)
+
+    async def run(llm, texts):
+        try:
+            return await llm.paraphrase_many(texts)
+        finally:
+            await llm.aclose()
+
+    cases = []
+    try:
+        for concurrency in args.llm_concurrency:
+            llm = AsyncLLMParaphraser(api_key="mock", base_url=base_url,
+                                      max_concurrency=concurrency, requests_per_second=1000.0)
+            for name, sentences in workloads.items():
+                times = measure(lambda: asyncio.run(run(llm, sentences)), args.warmup, args.repeats)
+                config = {"concurrency": concurrency, "server_latency": args.llm_latency}
+                cases.append(_case("llm", name, config, summarize(times, len(sentences))))
+                print(f"llm {name:<10} {config} p50={cases[-1]['p50']:.3f}s")
+    finally:
+        server.shutdown()
+
+    return cases
+
+
+def bench_metrics(args, workloads):
+    from evaluation.corpus_metrics import CorpusEvaluator
+    from evaluation.error_analysis import ErrorAnalyzer
+    from evaluation.metrics import ParaphraseEvaluator
+
+    evaluator = ParaphraseEvaluator()
+    rng = random.Random(args.seed)
+
+    def perturb(sentence):
+        words = sentence.split()
+        if len(words) > 3:
+            i = rng.randrange(len(words) - 1)
+            words[i], words[i + 1] = words[i + 1], words[i]
+        return " ".join(words)
+
+    metric_fns = {
+        "bleu": lambda pairs: [evaluator.calculate_bleu(r, c) for r, c in pairs],
+        "rouge": lambda pairs: [evaluator.calculate_rouge(r, c) for r, c in pairs],
+        "length_ratio": lambda pairs: [evaluator.calculate_length_ratio(r, c) for r, c in pairs],
+        # A fresh engine per run so its token cache does not flatter repeats
+        "corpus": lambda pairs: CorpusEvaluator().evaluate(pairs),
+        "error_analysis": lambda pairs: [ErrorAnalyzer().analyze_errors(r, c, c) for r, c in pairs],
+        "error_analysis_corpus": lambda pairs: ErrorAnalyzer().analyze_corpus((r, c, c) for r, c in pairs)
+    }
+    if not args.skip_bertscore:
+        metric_fns["bertscore"] = lambda pairs: evaluator.calculate_bertscore_batch(
+            [r for r, _ in pairs], [c for _, c in pairs]
+        )
+
+    cases = []
+    for name, sentences in workloads.items():
+        pairs = [(s, perturb(s)) for s in sentences]
+        for metric, fn in metric_fns.items():
+            times = measure(lambda: fn(pairs), args.warmup, args.repeats)
+            cases.append(_case("metric", name, {"metric": metric}, summarize(times, len(pairs))))
+            print(f"metric {metric:<12} {name:<10} p50={cases[-1]['p50']:.4f}s")
+
+    return cases
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+
+    info = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    try:
+        import torch
+        info["torch"] = torch.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline_results = json.load(f)
+    baseline = {case["key"]: case for case in baseline_results["cases"]}
+
+    print("\n" + "=" * 90)
+    print(f"{'Case':<62} {'Base p50':<10} {'New p50':<10} {'Change'}")
+    print("-" * 90)
+    for case in results["cases"]:
+        old = baseline.get(case["key"])
+        if old is None:
+            continue
+        change = (case["p50"] - old["p50"]) / old["p50"] * 100 if old["p50"] else 0.0
+        print(f"{case['key'][:62]:<62} {old['p50']:<10.4f} {case['p50']:<10.4f} {change:+.1f}%")
+    print("=" * 90)
+
+    if "peak_rss_mb" in results and "peak_rss_mb" in baseline_results:
+        print(f"Peak RSS: {baseline_results['peak_rss_mb']:.0f} MB -> {results['peak_rss_mb']:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paraphrase system benchmark suite")
+    parser.add_argument("--input", default="Data/test_passage.txt")
+    parser.add_argument("--targets", nargs="+", default=["cpg", "llm", "metrics"],
+                        choices=["cpg", "llm", "metrics"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--num-beams", type=int, nargs="+", default=[5])
+    parser.add_argument("--max-lengths", type=int, nargs="+", default=[128])
+    parser.add_argument("--decoding", nargs="+", default=["beam", "adaptive"],
+                        choices=["beam", "adaptive"],
+                        help="decoding modes to sweep (num_beams only applies to beam)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0],
+                        help="torch threads to sweep (0 keeps the default)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Run the CPG cases in low-memory mode")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Peak-RSS budget for the CPG batch scheduler")
+    parser.add_argument("--llm-concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--skip-bertscore", action="store_true")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write results as JSON to this path")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        workloads = build_workloads(split_sentences(f.read()), args.sizes, args.seed)
+
+    results = {"environment": environment(), "args": vars(args), "cases": []}
+
+    if "cpg" in args.targets:
+        results["cases"] += bench_cpg(args, workloads)
+    if "llm" in args.targets:
+        results["cases"] += bench_llm(args, workloads)
+    if "metrics" in args.targets:
+        results["cases"] += bench_metrics(args, workloads)
+    results["peak_rss_mb"] = peak_rss()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nWrote {len(results['cases'])} cases to {args.output}")
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
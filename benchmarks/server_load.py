@@ -0,0 +1,87 @@
+"""
+Concurrent load test for the paraphrase HTTP service.
+
+Sends sentences from the test passage from many client threads and reports
+throughput and latency percentiles. Run it against servers started with
+--max-batch-size 1 and with micro-batching enabled to compare.
+
+Usage:
+    python -m inference.server --max-batch-size 16 --max-wait-ms 10 &
+    python -m benchmarks.server_load --url http://127.0.0.1:5000 --clients 32 --requests 500
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from inference.preprocessing import split_sentences
+
+
+def _post(url, text, timeout):
+    body = json.dumps({"text": text}).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        status = exc.code
+    except (urllib.error.URLError, OSError) as exc:
+        # Refused/reset connections and timeouts under overload count as failed requests
+        reason = getattr(exc, "reason", exc)
+        status = "timeout" if isinstance(reason, TimeoutError) else "connection_error"
+    return status, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paraphrase service load test")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--input", default="Data/test_passage.txt")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        sentences = split_sentences(f.read())
+
+    url = args.url.rstrip("/") + "/paraphrase"
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def client():
+        for i in counter:
+            status, latency = _post(url, sentences[i % len(sentences)], args.timeout)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(latency)
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{args.requests} requests from {args.clients} clients in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.2f} sentences/s")
+    print(f"Status codes: {statuses}")
+    failed = args.requests - statuses.get(200, 0)
+    print(f"Failed requests: {failed} ({failed / max(args.requests, 1):.1%}), "
+          f"connection errors: {statuses.get('connection_error', 0)}, timeouts: {statuses.get('timeout', 0)}")
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"Latency p50: {p50:.3f}s  p95: {p95:.3f}s  p99: {p99:.3f}s  max: {max(latencies):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Import-time and first-request latency of the paraphrase system.
+
+Every measurement runs in a fresh interpreter so module caches and loaded
+weights do not leak between runs. Run it on two commits to compare startup
+before and after a change.
+
+Usage:
+    python -m benchmarks.startup --repeats 3
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+FIRST_REQUEST_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from inference.paraphrase import ParaphraseSystem
+system = ParaphraseSystem(use_llm=False)
+constructed = time.perf_counter()
+warmup = 0.0
+if {warmup}:
+    system.warmup()
+    warmup = time.perf_counter() - constructed
+request_start = time.perf_counter()
+system.cpg.paraphrase_paragraph("The quick brown fox jumps over the lazy dog.")
+print(json.dumps({{
+    "construct": constructed - start,
+    "warmup": warmup,
+    "first_request": time.perf_counter() - request_start
+}}))
+"""
+
+MODULES = ["inference.paraphrase", "evaluation.metrics", "models.cpg_model", "models.llm_baseline"]
+
+
+def _run(snippet):
+    completed = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup latency benchmark")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip-model", action="store_true", help="Only measure import times")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 60)
+    print(f"{'Import':<28} {'Median (s)':<12}")
+    print("-" * 60)
+    for module in MODULES:
+        try:
+            times = [_run(IMPORT_SNIPPET.format(module=module))["seconds"] for _ in range(args.repeats)]
+            print(f"{module:<28} {statistics.median(times):<12.3f}")
+        except RuntimeError as exc:
+            print(f"{module:<28} failed: {exc}")
+
+    if not args.skip_model:
+        print("-" * 60)
+        print(f"{'First request':<14} {'Construct':<11} {'Warm-up':<11} {'Request':<11}")
+        for warmup in (False, True):
+            result = _run(FIRST_REQUEST_SNIPPET.format(warmup=warmup))
+            label = "warm" if warmup else "cold"
+            print(f"{label:<14} {result['construct']:<11.3f} {result['warmup']:<11.3f} "
+                  f"{result['first_request']:<11.3f}")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
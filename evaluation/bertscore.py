@@ -0,0 +1,101 @@
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Tuple
+
+import torch
+from torch.nn.utils.rnn import pad_sequence
+from bert_score import BERTScorer
+from bert_score.utils import get_bert_embedding, greedy_cos_idf
+
+
+class BatchedBERTScorer:
+    def __init__(self, lang: str = "en", model_type: str = None, batch_size: int = 64,
+                 cache_size: int = 10000, device: str = None):
+        """
+        BERTScore with a persistent model and cached reference embeddings.
+
+        The scoring model is loaded once. Sentences are embedded in
+        length-sorted padded batches, and reference embeddings are kept in an
+        LRU cache so that scoring many candidates against the same sources
+        embeds each source only once. Scores match bert_score.score with the
+        same lang/model_type and default settings.
+        """
+        self.scorer = BERTScorer(lang=lang, model_type=model_type, batch_size=batch_size, device=device)
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+
+        tokenizer = self.scorer._tokenizer
+        self._idf_dict = defaultdict(lambda: 1.0)
+        self._idf_dict[tokenizer.sep_token_id] = 0
+        self._idf_dict[tokenizer.cls_token_id] = 0
+
+        self._reference_cache = OrderedDict()
+
+    def _embed(self, sentences: List[str]) -> Dict[str, Tuple[torch.Tensor, torch.Tensor]]:
+        """Embed unique sentences, returning sentence -> (embedding, idf) on CPU."""
+        unique = sorted(set(sentences), key=lambda s: len(s.split(" ")), reverse=True)
+
+        stats = {}
+        for start in range(0, len(unique), self.batch_size):
+            batch = unique[start:start + self.batch_size]
+            embeddings, masks, padded_idf = get_bert_embedding(
+                batch, self.scorer._model, self.scorer._tokenizer, self._idf_dict,
+                device=self.scorer.device
+            )
+            embeddings, masks, padded_idf = embeddings.cpu(), masks.cpu(), padded_idf.cpu()
+
+            for i, sentence in enumerate(batch):
+                length = int(masks[i].sum().item())
+                stats[sentence] = (embeddings[i, :length], padded_idf[i, :length])
+
+        return stats
+
+    def _reference_stats(self, references: List[str]) -> Dict[str, Tuple[torch.Tensor, torch.Tensor]]:
+        missing = [r for r in set(references) if r not in self._reference_cache]
+        for sentence, value in self._embed(missing).items():
+            self._reference_cache[sentence] = value
+
+        stats = {}
+        for sentence in references:
+            self._reference_cache.move_to_end(sentence)
+            stats[sentence] = self._reference_cache[sentence]
+
+        while len(self._reference_cache) > self.cache_size:
+            self._reference_cache.popitem(last=False)
+
+        return stats
+
+    def _pad(self, sentences: List[str], stats: Dict) -> Tuple[torch.Tensor, ...]:
+        device = self.scorer.device
+        embeddings = [stats[s][0].to(device) for s in sentences]
+        idfs = [stats[s][1].to(device) for s in sentences]
+        lengths = torch.tensor([e.size(0) for e in embeddings], dtype=torch.long)
+
+        embedding_pad = pad_sequence(embeddings, batch_first=True, padding_value=2.0)
+        idf_pad = pad_sequence(idfs, batch_first=True)
+        mask = torch.arange(embedding_pad.size(1)).expand(len(sentences), -1) < lengths.unsqueeze(1)
+
+        return embedding_pad, mask.to(device), idf_pad
+
+    def score(self, references: List[str], candidates: List[str]) -> List[float]:
+        """Return the BERTScore F1 of each (reference, candidate) pair."""
+        if len(references) != len(candidates):
+            raise ValueError("references and candidates must have the same length")
+        if not references:
+            return []
+
+        reference_stats = self._reference_stats(references)
+        candidate_stats = self._embed(candidates)
+
+        scores = []
+        with torch.no_grad():
+            for start in range(0, len(references), self.batch_size):
+                batch_refs = references[start:start + self.batch_size]
+                batch_cands = candidates[start:start + self.batch_size]
+
+                _, _, f1 = greedy_cos_idf(
+                    *self._pad(batch_refs, reference_stats),
+                    *self._pad(batch_cands, candidate_stats)
+                )
+                scores.extend(f1.cpu().tolist())
+
+        return scores
@@ -0,0 +1,209 @@
+import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from inference.preprocessing import TextPreprocessor, get_preprocessor
+
+# SmoothingFunction.method4 constant used by ParaphraseEvaluator.calculate_bleu
+_BLEU_SMOOTHING_K = 5
+
+
+def _densify(ref_codes: np.ndarray, cand_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Map the codes of both sides onto shared dense ids 0..K-1."""
+    uniques, inverse = np.unique(np.concatenate([ref_codes, cand_codes]), return_inverse=True)
+    return inverse[:len(ref_codes)], inverse[len(ref_codes):], len(uniques)
+
+
+def _ngram_overlaps(ref: np.ndarray, cand: np.ndarray, max_order: int) -> List[int]:
+    """
+    Clipped n-gram match counts for orders 1..max_order.
+
+    N-grams are numbered incrementally: the ids of order n+1 are built from
+    the dense ids of order n and the next unigram id, then re-densified, so
+    codes never overflow however large the vocabulary is.
+    """
+    ref_uni, cand_uni, vocab = _densify(ref, cand)
+    ref_ids, cand_ids, size = ref_uni, cand_uni, vocab
+
+    overlaps = []
+    for n in range(1, max_order + 1):
+        if n > 1:
+            ref_ids, cand_ids, size = _densify(
+                ref_ids[:-1] * vocab + ref_uni[n - 1:],
+                cand_ids[:-1] * vocab + cand_uni[n - 1:]
+            )
+
+        if len(ref_ids) == 0 or len(cand_ids) == 0:
+            overlaps.extend([0] * (max_order - n + 1))
+            break
+
+        ref_counts = np.bincount(ref_ids, minlength=size)
+        cand_counts = np.bincount(cand_ids, minlength=size)
+        overlaps.append(int(np.minimum(ref_counts, cand_counts).sum()))
+
+    return overlaps
+
+
+def _lcs_length(ref: np.ndarray, cand: np.ndarray) -> int:
+    """Longest common subsequence, one vectorized DP row per reference token."""
+    previous = np.zeros(len(cand) + 1, dtype=np.int64)
+    for token in ref:
+        candidates = np.maximum(previous[1:], previous[:-1] + (cand == token))
+        previous = np.concatenate(([0], np.maximum.accumulate(candidates)))
+    return int(previous[-1])
+
+
+def _fmeasure(precision: float, recall: float) -> float:
+    if precision + recall > 0:
+        return 2 * precision * recall / (precision + recall)
+    return 0.0
+
+
+def _bleu(overlaps: List[int], ref_len: int, hyp_len: int, max_order: int) -> float:
+    """Sentence BLEU with uniform weights and NLTK's smoothing method4."""
+    if hyp_len == 0 or overlaps[0] == 0:
+        return 0.0
+
+    log_precision = 0.0
+    smoothing_step = 1
+    for n, matches in enumerate(overlaps, start=1):
+        denominator = max(1, hyp_len - n + 1)
+
+        if matches == 0 and hyp_len > 1:
+            numerator = 1 / (2 ** smoothing_step * _BLEU_SMOOTHING_K / math.log(hyp_len))
+            smoothing_step += 1
+        else:
+            numerator = matches
+
+        # NLTK drops orders whose (smoothed) precision is still zero
+        if numerator > 0:
+            log_precision += math.log(numerator / denominator) / max_order
+
+    if hyp_len > ref_len:
+        brevity_penalty = 1.0
+    else:
+        brevity_penalty = math.exp(1 - ref_len / hyp_len)
+
+    return brevity_penalty * math.exp(log_precision)
+
+
+class CorpusEvaluator:
+    def __init__(self, max_order: int = 4, preprocessor: TextPreprocessor = None,
+                 max_cached_texts: int = 50000, max_vocab: int = 1000000):
+        """
+        Bulk BLEU, ROUGE-1/2/L and length ratio over whole datasets.
+
+        Each distinct text is tokenized once (whitespace tokens for BLEU and
+        length ratio, stemmed tokens for ROUGE) into integer-id arrays, and
+        n-gram statistics are computed with NumPy. Tokens come from the shared
+        preprocessor, so texts already tokenized by another stage are reused.
+        Scores match ParaphraseEvaluator.calculate_bleu / calculate_rouge.
+
+        Token arrays of the max_cached_texts most recently scored texts are
+        kept in an LRU cache, and the vocabulary is reset once it exceeds
+        max_vocab entries, so memory stays bounded on arbitrarily large corpora.
+        """
+        self.max_order = max_order
+        self.max_cached_texts = max_cached_texts
+        self.max_vocab = max_vocab
+        self._preprocessor = preprocessor or get_preprocessor()
+        self._vocab = {}
+        self._tokens = OrderedDict()
+
+    def clear(self):
+        """Drop cached token arrays and the vocabulary they index into."""
+        self._vocab = {}
+        self._tokens = OrderedDict()
+
+    def _to_ids(self, tokens: List[str]) -> np.ndarray:
+        vocab = self._vocab
+        return np.fromiter(
+            (vocab.setdefault(token, len(vocab)) for token in tokens),
+            dtype=np.int64,
+            count=len(tokens)
+        )
+
+    def _tokenize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._tokens.get(text)
+        if cached is not None:
+            self._tokens.move_to_end(text)
+            return cached
+
+        processed = self._preprocessor.process(text)
+        cached = self._tokens[text] = (
+            self._to_ids(processed.words),
+            self._to_ids(processed.rouge_tokens)
+        )
+        if len(self._tokens) > self.max_cached_texts:
+            self._tokens.popitem(last=False)
+        return cached
+
+    def score_pair(self, reference: str, candidate: str) -> Dict[str, float]:
+        # Reset between pairs, never between the two sides of one pair, so both share ids
+        if len(self._vocab) > self.max_vocab:
+            self.clear()
+        ref_words, ref_rouge = self._tokenize(reference)
+        cand_words, cand_rouge = self._tokenize(candidate)
+
+        bleu_overlaps = _ngram_overlaps(ref_words, cand_words, self.max_order)
+        bleu = _bleu(bleu_overlaps, len(ref_words), len(cand_words), self.max_order)
+
+        metrics = {'bleu': bleu}
+
+        rouge_overlaps = _ngram_overlaps(ref_rouge, cand_rouge, 2)
+        for n, matches in enumerate(rouge_overlaps, start=1):
+            ref_count = max(len(ref_rouge) - n + 1, 0)
+            cand_count = max(len(cand_rouge) - n + 1, 0)
+            precision = matches / max(cand_count, 1)
+            recall = matches / max(ref_count, 1)
+            metrics[f'rouge{n}'] = _fmeasure(precision, recall)
+
+        if len(ref_rouge) and len(cand_rouge):
+            lcs = _lcs_length(ref_rouge, cand_rouge)
+            metrics['rougeL'] = _fmeasure(lcs / len(cand_rouge), lcs / len(ref_rouge))
+        else:
+            metrics['rougeL'] = 0.0
+
+        metrics['length_ratio'] = len(cand_words) / len(ref_words) if len(ref_words) else 0.0
+        metrics['diversity'] = 1 - bleu
+
+        return metrics
+
+    def evaluate(self, pairs: Iterable[Tuple[str, str]], num_workers: int = 1,
+                 chunk_size: int = 1000) -> List[Dict[str, float]]:
+        """
+        Score (reference, candidate) pairs, in input order.
+
+        With num_workers > 1 the pairs are split into chunks and scored in a
+        process pool; each worker keeps its own token cache.
+        """
+        pairs = list(pairs)
+        if num_workers <= 1 or len(pairs) <= chunk_size:
+            return [self.score_pair(reference, candidate) for reference, candidate in pairs]
+
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            for chunk_results in pool.map(_evaluate_chunk, chunks, [self.max_order] * len(chunks)):
+                results.extend(chunk_results)
+        return results
+
+    @staticmethod
+    def summarize(results: List[Dict[str, float]]) -> Dict[str, float]:
+        """Mean of every metric over a list of per-pair results."""
+        if not results:
+            return {}
+        return {metric: float(np.mean([r[metric] for r in results])) for metric in results[0]}
+
+
+_worker_evaluator = None
+
+
+def _evaluate_chunk(pairs: List[Tuple[str, str]], max_order: int) -> List[Dict[str, float]]:
+    global _worker_evaluator
+    if _worker_evaluator is None or _worker_evaluator.max_order != max_order:
+        _worker_evaluator = CorpusEvaluator(max_order)
+    return [_worker_evaluator.score_pair(reference, candidate) for reference, candidate in pairs]
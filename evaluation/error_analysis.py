@@ -1,9 +1,159 @@
 import difflib
-from typing import List, Tuple, Dict
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from inference.preprocessing import get_preprocessor
+
+_STOPWORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+_WORD_RE = re.compile(r'\w+')
+
+
+class _TokenTable:
+    """
+    Interns whitespace tokens and caches everything derived from them.
+
+    Lowercasing, length, uppercase count and keyword extraction are done
+    once per distinct token instead of once per occurrence per text. The
+    numeric attributes live in one int32 array indexed by token id so a
+    text's statistics are a single fancy-indexing gather.
+    """
+
+    LOWER, LENGTH, UPPERCASE = range(3)
 
-class ErrorAnalyzer:
     def __init__(self):
-        pass
+        self.ids = {}
+        self.lower_ids = {}
+        self.keyword_ids = {}
+        self.keyword_words = []
+        self.keywords = []
+        self.columns = np.zeros((1024, 3), dtype=np.int32)
+
+    def intern(self, token: str) -> int:
+        token_id = self.ids.get(token)
+        if token_id is not None:
+            return token_id
+
+        token_id = self.ids[token] = len(self.ids)
+        if token_id == len(self.columns):
+            self.columns = np.concatenate([self.columns, np.zeros_like(self.columns)])
+
+        lower = token.lower()
+        self.columns[token_id] = (
+            self.lower_ids.setdefault(lower, len(self.lower_ids)),
+            len(token),
+            sum(1 for c in token if c.isupper())
+        )
+
+        # \w+ runs never cross whitespace, so per-token matches equal whole-text matches
+        keywords = []
+        for word in _WORD_RE.findall(lower):
+            if word not in _STOPWORDS and len(word) > 3:
+                if word not in self.keyword_ids:
+                    self.keyword_ids[word] = len(self.keyword_words)
+                    self.keyword_words.append(word)
+                keywords.append(self.keyword_ids[word])
+        self.keywords.append(tuple(keywords))
+        return token_id
+
+
+class _TextProfile:
+    """Every signal the error analysis needs from one text, computed in one pass."""
+
+    __slots__ = ('raw', 'vocabulary', 'char_total', 'uppercase', 'periods', 'keywords',
+                 'repeats', 'triple_repeat')
+
+    def __init__(self, text: str, table: _TokenTable, top_n: int = 10):
+        known = table.ids
+        words = get_preprocessor().words(text)
+        ids = [known[token] if token in known else table.intern(token) for token in words]
+        self.raw = np.array(ids, dtype=np.int32)
+
+        columns = table.columns[self.raw]
+        self.vocabulary = set(columns[:, table.LOWER].tolist())
+        self.char_total = int(columns[:, table.LENGTH].sum())
+        self.uppercase = int(columns[:, table.UPPERCASE].sum())
+        self.periods = text.count('.')
+
+        keywords = Counter(chain.from_iterable(map(table.keywords.__getitem__, ids)))
+        self.keywords = [word for word, _ in keywords.most_common(top_n)]
+
+        same = self.raw[1:] == self.raw[:-1]
+        self.repeats = int(same.sum())
+        self.triple_repeat = bool((same[1:] & same[:-1]).any())
+
+
+class ErrorAggregate:
+    """Streaming corpus statistics over analyze_errors-style results."""
+
+    _NUMERIC = ('lexical_overlap', 'unique_words_lost', 'new_words_added', 'repetition_score')
+
+    def __init__(self):
+        self.count = 0
+        self.sums = {system: dict.fromkeys(self._NUMERIC, 0.0) for system in ('cpg', 'llm')}
+        self.structure = {system: {} for system in ('cpg', 'llm')}
+        self.issues = {system: {} for system in ('cpg', 'llm')}
+        self.comparison = {}
+
+    @staticmethod
+    def _issue_type(issue: str) -> str:
+        return issue.split(':', 1)[0]
+
+    def add(self, analysis: Dict):
+        self.count += 1
+        for system in ('cpg', 'llm'):
+            data = analysis[system]
+            for metric in self._NUMERIC:
+                self.sums[system][metric] += data[metric]
+            change = data['structure_change']
+            self.structure[system][change] = self.structure[system].get(change, 0) + 1
+            for issue in data['key_issues']:
+                issue_type = self._issue_type(issue)
+                self.issues[system][issue_type] = self.issues[system].get(issue_type, 0) + 1
+
+        for errors in analysis['comparison'].values():
+            for error in errors:
+                self.comparison[error] = self.comparison.get(error, 0) + 1
+
+    def merge(self, other: 'ErrorAggregate'):
+        self.count += other.count
+        for system in ('cpg', 'llm'):
+            for metric in self._NUMERIC:
+                self.sums[system][metric] += other.sums[system][metric]
+            for mine, theirs in ((self.structure[system], other.structure[system]),
+                                 (self.issues[system], other.issues[system])):
+                for key, value in theirs.items():
+                    mine[key] = mine.get(key, 0) + value
+        for key, value in other.comparison.items():
+            self.comparison[key] = self.comparison.get(key, 0) + value
+
+    def summary(self) -> Dict:
+        """Per-system metric means, structure-change and issue rates, comparison rates."""
+        n = max(self.count, 1)
+        summary = {'triples': self.count}
+        for system in ('cpg', 'llm'):
+            summary[system] = {
+                **{f'mean_{metric}': total / n for metric, total in self.sums[system].items()},
+                'structure_change': {k: v / n for k, v in self.structure[system].items()},
+                'issue_rate': {k: v / n for k, v in self.issues[system].items()}
+            }
+        summary['comparison_rate'] = {k: v / n for k, v in self.comparison.items()}
+        return summary
+
+
+class ErrorAnalyzer:
+    def __init__(self, max_tokens: int = 1000000):
+        """
+        The token table used by analyze_triple is reset once it holds more
+        than max_tokens distinct tokens, so memory stays bounded on
+        arbitrarily large corpora.
+        """
+        self.max_tokens = max_tokens
+        self._table = _TokenTable()
     
     def analyze_errors(self, original: str, cpg_output: str, llm_output: str) -> Dict:
         """
@@ -101,13 +251,9 @@ class ErrorAnalyzer:
     
     def _extract_keywords(self, text: str, top_n: int = 10) -> set:
         """Extract top keywords from text."""
-        from collections import Counter
-        import re
-        
         # Remove common stopwords
-        stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
         words = re.findall(r'\b\w+\b', text.lower())
-        words = [w for w in words if w not in stopwords and len(w) > 3]
+        words = [w for w in words if w not in _STOPWORDS and len(w) > 3]
         
         # Get most common words
         common_words = Counter(words).most_common(top_n)
@@ -165,6 +311,137 @@ class ErrorAnalyzer:
         short_sentences = sum(1 for s in sentences if len(s.split()) <= threshold)
         return short_sentences > len(sentences) * 0.3
     
+    def _profile_analysis(self, original: _TextProfile, paraphrase: _TextProfile,
+                          system_name: str) -> Dict:
+        common = len(original.vocabulary & paraphrase.vocabulary)
+        
+        words = len(paraphrase.raw)
+        repetition_score = paraphrase.repeats / words if words >= 2 else 0
+        
+        period_diff = abs(original.periods - paraphrase.periods)
+        if period_diff > 2:
+            structure_change = "major_restructuring"
+        elif period_diff > 0:
+            structure_change = "moderate_restructuring"
+        else:
+            structure_change = "minimal_restructuring"
+        
+        issues = []
+        para_keywords = set(paraphrase.keywords)
+        missing_keywords = [k for k in original.keywords if k not in para_keywords]
+        if len(missing_keywords) > 2:
+            missing_words = [self._table.keyword_words[k] for k in missing_keywords[:3]]
+            issues.append(f"Missing key concepts: {missing_words}")
+        
+        orig_avg_word_len = original.char_total / len(original.raw) if len(original.raw) else 0.0
+        para_avg_word_len = paraphrase.char_total / words if words else 0.0
+        if para_avg_word_len < orig_avg_word_len * 0.8:
+            issues.append("Over-simplification of vocabulary")
+        
+        if paraphrase.uppercase > original.uppercase * 1.5:
+            issues.append("Possible hallucinated content")
+        
+        return {
+            'system': system_name,
+            'lexical_overlap': common / max(len(original.vocabulary), 1),
+            'unique_words_lost': len(original.vocabulary) - common,
+            'new_words_added': len(paraphrase.vocabulary) - common,
+            'repetition_score': repetition_score,
+            'structure_change': structure_change,
+            'key_issues': issues
+        }
+    
+    def analyze_triple(self, original: str, cpg_output: str, llm_output: str) -> Dict:
+        """
+        Single-pass equivalent of analyze_errors.
+        
+        Each text is tokenized once into interned token-id arrays and every
+        signal is derived from those. Results match analyze_errors except
+        that missing keywords are listed in keyword rank order and empty
+        texts do not raise.
+        """
+        # Reset between triples, never within one, so all three profiles share ids
+        if len(self._table.ids) > self.max_tokens:
+            self._table = _TokenTable()
+        orig = _TextProfile(original, self._table)
+        cpg = _TextProfile(cpg_output, self._table)
+        llm = _TextProfile(llm_output, self._table)
+        
+        comparison = {
+            'common_errors': [],
+            'cpg_specific': [],
+            'llm_specific': []
+        }
+        if cpg.triple_repeat and llm.triple_repeat:
+            comparison['common_errors'].append("Both outputs contain repetition")
+        if len(cpg.vocabulary) < len(llm.vocabulary) * 0.7:
+            comparison['cpg_specific'].append("CPG output has significantly less lexical diversity")
+        if self._has_short_sentences(llm_output):
+            comparison['llm_specific'].append("LLM output contains very short sentences")
+        
+        return {
+            'cpg': self._profile_analysis(orig, cpg, 'CPG'),
+            'llm': self._profile_analysis(orig, llm, 'LLM'),
+            'comparison': comparison
+        }
+    
+    def iter_analyses(self, triples: Iterable[Tuple[str, str, str]], num_workers: int = 1,
+                      chunk_size: int = 500) -> Iterator[Dict]:
+        """
+        Analyze (original, cpg_output, llm_output) triples lazily, in input order.
+        
+        With num_workers > 1, chunks of triples are analyzed in a process
+        pool with at most two chunks per worker in flight, so arbitrarily
+        large corpora stream through in bounded memory.
+        """
+        if num_workers <= 1:
+            for original, cpg_output, llm_output in triples:
+                yield self.analyze_triple(original, cpg_output, llm_output)
+            return
+        
+        for results in _map_chunks(_analyze_chunk, triples, num_workers, chunk_size):
+            yield from results
+    
+    def analyze_corpus(self, triples: Iterable[Tuple[str, str, str]], num_workers: int = 1,
+                       chunk_size: int = 500) -> Dict:
+        """
+        Aggregate error statistics over a corpus of triples.
+        
+        Only running totals are kept; with num_workers > 1 each worker
+        aggregates its chunks and the partial aggregates are merged.
+        """
+        aggregate = ErrorAggregate()
+        if num_workers <= 1:
+            for analysis in self.iter_analyses(triples):
+                aggregate.add(analysis)
+        else:
+            for partial in _map_chunks(_aggregate_chunk, triples, num_workers, chunk_size):
+                aggregate.merge(partial)
+        return aggregate.summary()
+    
+    def print_corpus_summary(self, summary: Dict):
+        """Print analyze_corpus output."""
+        print("\n" + "="*60)
+        print(f"CORPUS ERROR ANALYSIS ({summary['triples']} triples)")
+        print("="*60)
+        
+        for system in ['cpg', 'llm']:
+            data = summary[system]
+            print(f"\n{system.upper()}:")
+            print(f"  Mean Lexical Overlap: {data['mean_lexical_overlap']:.2%}")
+            print(f"  Mean Unique Words Lost: {data['mean_unique_words_lost']:.2f}")
+            print(f"  Mean New Words Added: {data['mean_new_words_added']:.2f}")
+            print(f"  Mean Repetition Score: {data['mean_repetition_score']:.3f}")
+            for change, rate in sorted(data['structure_change'].items()):
+                print(f"  {change}: {rate:.1%}")
+            for issue, rate in sorted(data['issue_rate'].items()):
+                print(f"    • {issue}: {rate:.1%}")
+        
+        if summary['comparison_rate']:
+            print("\nComparison:")
+            for error, rate in sorted(summary['comparison_rate'].items()):
+                print(f"    • {error}: {rate:.1%}")
+    
     def print_analysis(self, analysis: Dict):
         """Print formatted error analysis."""
         print("\n" + "="*60)
@@ -200,4 +477,50 @@ class ErrorAnalyzer:
         if comp['llm_specific']:
             print("  LLM-Specific Issues:")
             for issue in comp['llm_specific']:
-                print(f"    • {issue}")
\ No newline at end of file
+                print(f"    • {issue}")
+
+
+def _chunks(items: Iterable, chunk_size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _map_chunks(fn, items: Iterable, num_workers: int, chunk_size: int) -> Iterator:
+    """Ordered pool.map over chunks of items that keeps only 2 x num_workers chunks in flight."""
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        pending = deque()
+        for chunk in _chunks(items, chunk_size):
+            pending.append(pool.submit(fn, chunk))
+            if len(pending) >= 2 * num_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+_worker_analyzer = None
+
+
+def _get_worker_analyzer() -> ErrorAnalyzer:
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = ErrorAnalyzer()
+    return _worker_analyzer
+
+
+def _analyze_chunk(triples: List[Tuple[str, str, str]]) -> List[Dict]:
+    analyzer = _get_worker_analyzer()
+    return [analyzer.analyze_triple(*triple) for triple in triples]
+
+
+def _aggregate_chunk(triples: List[Tuple[str, str, str]]) -> ErrorAggregate:
+    analyzer = _get_worker_analyzer()
+    aggregate = ErrorAggregate()
+    for triple in triples:
+        aggregate.add(analyzer.analyze_triple(*triple))
+    return aggregate
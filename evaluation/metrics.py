@@ -1,23 +1,72 @@
-import numpy as np
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Iterable
 import time
-from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
-from rouge_score import rouge_scorer
-from bert_score import score as bert_score
-import torch
+import warnings
+from inference.preprocessing import get_preprocessor
+from inference.profiling import span
+
+# Metric columns written by ParaphraseEvaluator.evaluate_store
+STORE_METRICS = ("bleu", "rouge1", "rouge2", "rougeL", "bertscore", "length_ratio", "diversity")
 
 class ParaphraseEvaluator:
-    def __init__(self):
-        """Initialize evaluation metrics."""
-        self.rouge_scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
-        self.smoothie = SmoothingFunction().method4
+    def __init__(self, bertscore_batch_size: int = 64):
+        """
+        Initialize evaluation metrics.
+        
+        Scorers (and their heavy imports: nltk, rouge_score, torch and
+        bert_score) are created on first use.
+        """
+        self.bertscore_batch_size = bertscore_batch_size
+        self._rouge_scorer = None
+        self._smoothie = None
+        self._bertscorer = None
+        self._corpus = None
+    
+    @property
+    def rouge_scorer(self):
+        if self._rouge_scorer is None:
+            from rouge_score import rouge_scorer
+            # The shared preprocessor tokenizes and stems exactly like use_stemmer=True,
+            # and reuses tokens of texts it has already seen
+            self._rouge_scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'],
+                                                          tokenizer=get_preprocessor())
+        return self._rouge_scorer
+    
+    @property
+    def smoothie(self):
+        if self._smoothie is None:
+            from nltk.translate.bleu_score import SmoothingFunction
+            self._smoothie = SmoothingFunction().method4
+        return self._smoothie
+    
+    @property
+    def bertscorer(self):
+        """Persistent BERTScore model, loaded on first use."""
+        if self._bertscorer is None:
+            from evaluation.bertscore import BatchedBERTScorer
+            self._bertscorer = BatchedBERTScorer(lang='en', batch_size=self.bertscore_batch_size)
+        return self._bertscorer
+    
+    @property
+    def corpus(self):
+        """Vectorized BLEU/ROUGE engine used by evaluate_many."""
+        if self._corpus is None:
+            from evaluation.corpus_metrics import CorpusEvaluator
+            self._corpus = CorpusEvaluator()
+        return self._corpus
+    
+    def warmup(self):
+        """Load every scorer and run one dummy evaluation."""
+        self.evaluate_paraphrase("Warm up the evaluator.", "Warm the evaluator up.")
     
     def calculate_bleu(self, reference: str, candidate: str) -> float:
         """
         Calculate BLEU score between reference and candidate.
         """
-        ref_tokens = reference.split()
-        cand_tokens = candidate.split()
+        from nltk.translate.bleu_score import sentence_bleu
+        
+        preprocessor = get_preprocessor()
+        ref_tokens = preprocessor.words(reference)
+        cand_tokens = preprocessor.words(candidate)
         
         # BLEU with smoothing for short texts
         try:
@@ -43,20 +92,27 @@ class ParaphraseEvaluator:
         """
         Calculate BERTScore for semantic similarity.
         """
+        return self.calculate_bertscore_batch([reference], [candidate])[0]
+    
+    def calculate_bertscore_batch(self, references: List[str], candidates: List[str]) -> List[float]:
+        """
+        Calculate BERTScore F1 for many pairs in padded batches.
+        
+        Returns NaN scores (with a warning) if BERTScore cannot be computed.
+        """
         try:
-            P, R, F1 = bert_score([candidate], [reference], 
-                                 lang='en', verbose=False)
-            return F1.item()
-        except:
-            # Fallback if BERTScore fails
-            return 0.5
+            return self.bertscorer.score(references, candidates)
+        except Exception as exc:
+            warnings.warn(f"BERTScore failed, reporting NaN: {exc!r}")
+            return [float('nan')] * len(references)
     
     def calculate_length_ratio(self, reference: str, candidate: str) -> float:
         """
         Calculate length ratio: candidate length / reference length.
         """
-        ref_words = len(reference.split())
-        cand_words = len(candidate.split())
+        preprocessor = get_preprocessor()
+        ref_words = len(preprocessor.words(reference))
+        cand_words = len(preprocessor.words(candidate))
         
         if ref_words == 0:
             return 0.0
@@ -70,23 +126,105 @@ class ParaphraseEvaluator:
         metrics = {}
         
         # BLEU
-        metrics['bleu'] = self.calculate_bleu(original, paraphrase)
+        with span("eval.bleu"):
+            metrics['bleu'] = self.calculate_bleu(original, paraphrase)
         
         # ROUGE
-        rouge_scores = self.calculate_rouge(original, paraphrase)
+        with span("eval.rouge"):
+            rouge_scores = self.calculate_rouge(original, paraphrase)
         metrics.update(rouge_scores)
         
         # BERTScore
-        metrics['bertscore'] = self.calculate_bertscore(original, paraphrase)
+        with span("eval.bertscore"):
+            metrics['bertscore'] = self.calculate_bertscore(original, paraphrase)
         
         # Length ratio
-        metrics['length_ratio'] = self.calculate_length_ratio(original, paraphrase)
+        with span("eval.length_ratio"):
+            metrics['length_ratio'] = self.calculate_length_ratio(original, paraphrase)
         
         # Diversity (self-BLEU between original and paraphrase, lower is better)
         metrics['diversity'] = 1 - metrics['bleu']  # Simple diversity measure
         
         return metrics
     
+    def evaluate_many(self, pairs: Iterable[Tuple[str, str]], num_workers: int = 1) -> List[Dict[str, float]]:
+        """
+        Evaluate many (original, paraphrase) pairs.
+        
+        BLEU, ROUGE and length ratio come from the vectorized corpus engine
+        (optionally across num_workers processes) and BERTScore for all pairs
+        is computed in one batched pass with the persistent scorer. Results
+        match evaluate_paraphrase.
+        """
+        pairs = list(pairs)
+        with span("eval.corpus"):
+            results = self.corpus.evaluate(pairs, num_workers=num_workers)
+        
+        originals = [original for original, _ in pairs]
+        paraphrases = [paraphrase for _, paraphrase in pairs]
+        with span("eval.bertscore"):
+            bertscores = self.calculate_bertscore_batch(originals, paraphrases)
+        
+        for metrics, bertscore in zip(results, bertscores):
+            metrics['bertscore'] = bertscore
+        
+        return results
+    
+    def evaluate_store(self, reader, output_path: str, source_column: str = "source",
+                       paraphrase_column: str = "paraphrase", chunk_size: int = 10000,
+                       num_workers: int = 1) -> Dict[str, Dict[str, float]]:
+        """
+        Evaluate every pair of a sharded dataset (storage.shards.ShardReader).
+        
+        Pairs are streamed in chunks of chunk_size through evaluate_many and
+        the corpus engine's token caches are cleared after every chunk, so
+        the corpus never has to fit in memory. The metrics are written to
+        a new sharded dataset at output_path next to the id (when present),
+        source and paraphrase of each row, replacing any shards already
+        there. Rows with a non-empty "error" column get NaN metrics. Returns
+        count/mean/min/max per metric.
+        """
+        from itertools import islice
+        from storage.shards import ShardReader, ShardWriter
+        
+        has_id = "id" in reader.columns
+        columns = {"id": "str"} if has_id else {}
+        columns.update({"source": "str", "paraphrase": "str"})
+        columns.update({metric: "float64" for metric in STORE_METRICS})
+        
+        read_columns = [source_column, paraphrase_column]
+        read_columns += [name for name in ("id", "error") if name in reader.columns]
+        records = reader.iter_records(read_columns)
+        evaluated = 0
+        
+        with ShardWriter(output_path, columns, shard_size=chunk_size) as writer:
+            # A re-run replaces the previous results instead of appending to them
+            writer.truncate_shards(0)
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                
+                valid = [r for r in chunk if not r.get("error")]
+                results = iter(self.evaluate_many(
+                    [(r[source_column], r[paraphrase_column]) for r in valid], num_workers=num_workers
+                ))
+                
+                for record in chunk:
+                    row = {"id": record.get("id"), "source": record[source_column],
+                           "paraphrase": record[paraphrase_column]}
+                    if not record.get("error"):
+                        row.update(next(results))
+                    writer.append(row)
+                
+                # Token caches only help within a chunk; keep memory flat across the corpus
+                self.corpus.clear()
+                evaluated += len(chunk)
+                print(f"Evaluated {evaluated} pairs")
+        
+        results = ShardReader(output_path)
+        return {metric: results.aggregate(metric) for metric in STORE_METRICS}
+    
     def compare_systems(self, original: str, cpg_output: str, llm_output: str, 
                        cpg_time: float, llm_time: float) -> Dict:
         """
@@ -0,0 +1,327 @@
+"""
+Streaming JSONL batch runner for the CPG model.
+
+Reads requests lazily, one JSON object per line, paraphrases them in
+bounded chunks and appends one JSON result per line as it goes. After every
+chunk the byte offset of the next unread request is written to a checkpoint
+file, so an interrupted run can be resumed with --resume.
+
+With --store DIR results are also appended to a memory-mapped sharded
+dataset (storage/shards.py) that ParaphraseEvaluator.evaluate_store and
+ShardReader.select can query without loading it. The input may itself be a
+sharded dataset directory with a text column.
+
+Usage:
+    python -m inference.batch_runner requests.jsonl results.jsonl --resume
+    python -m inference.batch_runner requests.jsonl results.jsonl --store results_store/
+"""
+import argparse
+import json
+import os
+import time
+from itertools import islice
+
+from storage.shards import ShardReader, ShardWriter
+
+# Columns of the result store written with --store
+STORE_COLUMNS = {"id": "str", "source": "str", "paraphrase": "str", "error": "str",
+                 "chunk_elapsed": "float64"}
+
+
+def read_requests(path, offset=0):
+    """
+    Lazily yield (next_offset, line_offset, record) for each JSONL request.
+
+    next_offset is the byte offset just past the record, which is what gets
+    checkpointed. Malformed lines are yielded with record set to None.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            line_offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+
+            yield f.tell(), line_offset, record
+
+
+def read_store_requests(path, offset=0):
+    """
+    Like read_requests, but over the rows of a sharded dataset directory.
+
+    Offsets are row numbers, so checkpoints work the same way.
+    """
+    reader = ShardReader(path)
+    for row, record in enumerate(reader.iter_records(start=offset), start=offset):
+        yield row + 1, row, record
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, offset, records, output_bytes, store=None):
+    """
+    Atomically record progress.
+
+    store, if given, is the progress dict at the last result-store shard
+    (offset, records, output_bytes and shards); resuming with a store starts
+    from there so both outputs stay in step.
+    """
+    checkpoint = {"offset": offset, "records": records, "output_bytes": output_bytes}
+    if store is not None:
+        checkpoint["store"] = store
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _write_result(out, result):
+    out.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+class BatchRunner:
+    def __init__(self, generator, chunk_size=64, max_batch_tokens=2048,
+                 text_field="text", id_field="id", store_path=None, store_shard_size=10000):
+        self.generator = generator
+        self.chunk_size = chunk_size
+        self.max_batch_tokens = max_batch_tokens
+        self.text_field = text_field
+        self.id_field = id_field
+        self.store_path = store_path
+        self.store_shard_size = store_shard_size
+        self.store = None
+
+    def _record_id(self, record, line_offset):
+        if isinstance(record, dict) and self.id_field in record:
+            return record[self.id_field]
+        return line_offset
+
+    def _is_valid(self, record):
+        return isinstance(record, dict) and isinstance(record.get(self.text_field), str)
+
+    def _store_result(self, result, record):
+        self.store.append({
+            "id": str(result["id"]),
+            "source": record.get(self.text_field) if isinstance(record, dict) else None,
+            "paraphrase": result.get("paraphrase"),
+            "error": result.get("error"),
+            "chunk_elapsed": result.get("chunk_elapsed")
+        })
+
+    def _process_chunk(self, chunk, out):
+        start = time.time()
+        documents = (record[self.text_field] for _, _, record in chunk if self._is_valid(record))
+        outputs = self.generator.paraphrase_documents(documents, self.max_batch_tokens)
+
+        for _, line_offset, record in chunk:
+            result = {"id": self._record_id(record, line_offset)}
+
+            if self._is_valid(record):
+                result["paraphrase"] = next(outputs)
+                # Documents of a chunk are generated in shared batches, so this is the time
+                # from the chunk's start until this document was ready, not its own latency
+                result["chunk_elapsed"] = time.time() - start
+            else:
+                result["error"] = f"missing or malformed '{self.text_field}' field"
+
+            _write_result(out, result)
+            if self.store is not None:
+                self._store_result(result, record)
+
+        out.flush()
+
+    def run(self, input_path, output_path, checkpoint_path=None, resume=False):
+        """
+        Stream input_path through the generator into output_path.
+
+        Memory use is bounded by chunk_size records regardless of file size.
+        input_path may be a JSONL file or a sharded dataset directory.
+        Returns the total number of records processed, including resumed ones.
+        """
+        checkpoint_path = checkpoint_path or output_path + ".ckpt"
+
+        checkpoint = load_checkpoint(checkpoint_path) if resume else None
+        if checkpoint and self.store_path:
+            # Rows after the last store shard were never persisted there; redo them
+            checkpoint = checkpoint.get("store", {"offset": 0, "records": 0, "output_bytes": 0, "shards": 0})
+
+        if self.store_path:
+            self.store = ShardWriter(self.store_path, STORE_COLUMNS, shard_size=None)
+            self.store.truncate_shards(checkpoint["shards"] if checkpoint else 0)
+
+        offset, processed = 0, 0
+        if checkpoint:
+            offset, processed = checkpoint["offset"], checkpoint["records"]
+            print(f"Resuming from offset {offset} ({processed} records done)")
+
+            # Drop results written after the last checkpoint so they are not duplicated
+            with open(output_path, "ab") as out:
+                out.truncate(checkpoint["output_bytes"])
+
+        if os.path.isdir(input_path):
+            requests = read_store_requests(input_path, offset)
+        else:
+            requests = read_requests(input_path, offset)
+        mode = "ab" if checkpoint else "wb"
+
+        store_state = None
+        if self.store is not None:
+            store_state = {"offset": offset, "records": processed,
+                           "output_bytes": checkpoint["output_bytes"] if checkpoint else 0,
+                           "shards": self.store.num_shards}
+
+        with open(output_path, mode) as out:
+            while True:
+                chunk = list(islice(requests, self.chunk_size))
+                if not chunk:
+                    break
+
+                start = time.time()
+                self._process_chunk(chunk, out)
+                os.fsync(out.fileno())
+
+                processed += len(chunk)
+                offset = chunk[-1][0]
+                if self.store is not None and self.store.buffered >= self.store_shard_size:
+                    store_state = self._flush_store(offset, processed, out.tell())
+                save_checkpoint(checkpoint_path, offset, processed, out.tell(), store_state)
+
+                elapsed = time.time() - start
+                print(f"Processed {processed} records ({len(chunk) / elapsed:.2f} records/s)")
+
+            if self.store is not None and self.store.buffered:
+                store_state = self._flush_store(offset, processed, out.tell())
+                save_checkpoint(checkpoint_path, offset, processed, out.tell(), store_state)
+
+        return processed
+
+    def _flush_store(self, offset, processed, output_bytes):
+        """Write the buffered results as one store shard and return the new store progress."""
+        self.store.flush()
+        return {"offset": offset, "records": processed, "output_bytes": output_bytes,
+                "shards": self.store.num_shards}
+
+
+def main():
+    from models.backends import BACKENDS
+    from models.cache import ParaphraseCache
+    from models.cpg_model import CustomParaphraseGenerator
+    from models.reranking import CandidateReranker
+    from models.worker_pool import CPGWorkerPool
+    from inference.profiling import HistogramCollector, TorchProfilerCollector, set_collector, torch_trace
+
+    parser = argparse.ArgumentParser(description="Streaming JSONL paraphrase runner")
+    parser.add_argument("input", nargs="?", default="requests.jsonl")
+    parser.add_argument("output", nargs="?", default="results.jsonl")
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--max-batch-tokens", type=int, default=2048)
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--store", default=None,
+                        help="Also write results to a memory-mapped sharded dataset in this directory")
+    parser.add_argument("--store-shard-size", type=int, default=10000)
+    parser.add_argument("--cache", default=None, help="SQLite file for the persistent sentence cache")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Run generation in a pool of this many worker processes")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--backend", default="torch", choices=BACKENDS)
+    parser.add_argument("--decoding", default="beam", choices=["adaptive", "beam"],
+                        help="adaptive: length windows and beam escalation, faster but different outputs")
+    parser.add_argument("--speculative", default=None,
+                        help="Draft-and-verify greedy passes: prompt_lookup or a draft model name")
+    parser.add_argument("--local-files-only", action="store_true",
+                        help="Load model weights from the local cache without network access")
+    parser.add_argument("--rerank", type=int, default=0,
+                        help="Rerank this many beam candidates per sentence (0 keeps the top beam)")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Low-memory loading, reused input buffers and one batch in flight")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Shrink batches while resident memory (per process) exceeds this")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Torch threads for in-process generation")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings at the end")
+    parser.add_argument("--torch-trace", default=None, help="Write a torch.profiler Chrome trace here")
+    args = parser.parse_args()
+
+    collector = None
+    if args.torch_trace:
+        collector = TorchProfilerCollector()
+    elif args.profile:
+        collector = HistogramCollector()
+    set_collector(collector)
+
+    reranker = None
+    if args.rerank:
+        reranker = CandidateReranker(num_candidates=args.rerank)
+        if args.decoding == "adaptive":
+            # Adaptive decoding starts greedy and only reranks escalated beam passes
+            print("Warning: --rerank with --decoding adaptive only reranks sentences that escalate "
+                  "to beam search; use --decoding beam to rerank every sentence")
+
+    cache = ParaphraseCache(path=args.cache)
+    if args.workers:
+        # Each worker keeps its own generator; the parent-side cache is unused
+        generator = CPGWorkerPool(args.workers, args.threads_per_worker, backend=args.backend,
+                                  decoding=args.decoding, speculative=args.speculative,
+                                  local_files_only=args.local_files_only, reranker=reranker,
+                                  low_memory=args.low_memory, memory_budget_mb=args.memory_budget_mb)
+    else:
+        generator = CustomParaphraseGenerator(cache=cache, backend=args.backend, decoding=args.decoding,
+                                              speculative=args.speculative,
+                                              local_files_only=args.local_files_only,
+                                              reranker=reranker, low_memory=args.low_memory,
+                                              memory_budget_mb=args.memory_budget_mb,
+                                              num_threads=args.threads)
+
+    runner = BatchRunner(
+        generator,
+        chunk_size=args.chunk_size,
+        max_batch_tokens=args.max_batch_tokens,
+        text_field=args.text_field,
+        id_field=args.id_field,
+        store_path=args.store,
+        store_shard_size=args.store_shard_size
+    )
+    try:
+        if args.torch_trace:
+            with torch_trace(args.torch_trace):
+                runner.run(args.input, args.output, args.checkpoint, args.resume)
+        else:
+            runner.run(args.input, args.output, args.checkpoint, args.resume)
+    finally:
+        if args.workers:
+            generator.close()
+        cache.close()
+
+    if not args.workers:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate)")
+
+    if not args.workers and generator.memory_budget is not None:
+        stats = generator.memory_budget.stats()
+        print(f"Memory: peak RSS {stats['peak_rss_mb']:.0f} MB, batch limit shrunk "
+              f"{stats['shrinks']} times")
+
+    if collector is not None:
+        collector.print_summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,131 @@
+import asyncio
+import os
 import time
-from models.cpg_model import CustomParaphraseGenerator
-from models.llm_baseline import LLMParaphraser
-from evaluation.metrics import ParaphraseEvaluator
+from dotenv import load_dotenv
+
+load_dotenv()
 
 
 class ParaphraseSystem:
-    def __init__(self):
+    def __init__(self, llm_base_url=None, use_llm=None, llm_api_key=None, decoding="beam"):
+        """
+        Components are created lazily on first use, so importing and
+        constructing the system is cheap and only the parts a run needs are
+        loaded. use_llm=None enables the LLM baseline only when an API key or
+        base URL is available; without it comparisons run CPG alone.
+        llm_api_key overrides OPENAI_API_KEY; with only llm_base_url set (a
+        local mock server) a placeholder key is used. decoding is passed to
+        CustomParaphraseGenerator ("beam" or the opt-in "adaptive").
+        """
         print("Initializing Paraphrase System...")
 
-        self.cpg = CustomParaphraseGenerator()
-        self.llm = LLMParaphraser()
-        self.evaluator = ParaphraseEvaluator()
+        if use_llm is None:
+            use_llm = bool(llm_api_key or os.getenv("OPENAI_API_KEY") or llm_base_url)
+
+        self.llm_base_url = llm_base_url
+        self.llm_api_key = llm_api_key
+        self.use_llm = use_llm
+        self.decoding = decoding
+
+        self._cpg = None
+        self._llm = None
+        self._evaluator = None
+
+        if not use_llm:
+            print("OPENAI_API_KEY not set; LLM baseline disabled.")
 
         print("System initialized successfully!")
 
+    @property
+    def cpg(self):
+        if self._cpg is None:
+            from models.cpg_model import CustomParaphraseGenerator
+            self._cpg = CustomParaphraseGenerator(decoding=self.decoding)
+        return self._cpg
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from models.llm_baseline import AsyncLLMParaphraser
+            self._llm = AsyncLLMParaphraser(api_key=self.llm_api_key, base_url=self.llm_base_url)
+        return self._llm
+
+    def _ensure_llm(self):
+        """Build the LLM baseline now, so a missing API key fails at warm-up."""
+        return self.llm
+
+    @property
+    def evaluator(self):
+        if self._evaluator is None:
+            from evaluation.metrics import ParaphraseEvaluator
+            self._evaluator = ParaphraseEvaluator()
+        return self._evaluator
+
+    def warmup(self):
+        """
+        Load every enabled component and run one dummy request through it,
+        so the first real request does not pay for weight loading.
+        """
+        start = time.time()
+
+        self.cpg.warmup()
+        self.evaluator.warmup()
+        if self.use_llm:
+            self._ensure_llm()
+
+        print(f"Warm-up finished in {time.time() - start:.2f}s")
+
+    def _run_cpg(self, input_text, min_length_ratio):
+        start = time.time()
+        output = self.cpg.paraphrase_paragraph(input_text, min_length_ratio)
+        return output, time.time() - start
+
+    async def _run_llm(self, input_text, min_length_ratio):
+        start = time.time()
+        output = await self.llm.paraphrase_paragraph(input_text, min_length_ratio)
+        return output, time.time() - start
+
+    async def _run_systems(self, input_text, min_length_ratio):
+        """Run CPG (in a worker thread) and the LLM request at the same time."""
+        try:
+            return await asyncio.gather(
+                asyncio.to_thread(self._run_cpg, input_text, min_length_ratio),
+                self._run_llm(input_text, min_length_ratio)
+            )
+        finally:
+            await self.llm.aclose()
+
     def run_comparison(self, input_text, min_length_ratio=0.8):
 
         word_count = len(input_text.split())
         print(f"\nOriginal Text ({word_count} words)")
         print("=" * 60)
 
-        # -------- CPG --------
-        print("\nRunning Custom Paraphrase Generator...")
-        start = time.time()
-        cpg_output = self.cpg.paraphrase_paragraph(input_text, min_length_ratio)
-        cpg_time = time.time() - start
+        if not self.use_llm:
+            print("\nRunning Custom Paraphrase Generator...")
+            cpg_output, cpg_time = self._run_cpg(input_text, min_length_ratio)
+            cpg_metrics = self.evaluator.evaluate_paraphrase(input_text, cpg_output)
+
+            print("\n" + "=" * 60)
+            print("CPG RESULTS")
+            print("=" * 60)
+
+            print(f"BLEU        CPG: {cpg_metrics['bleu']:.4f}")
+            print(f"ROUGE-L     CPG: {cpg_metrics['rougeL']:.4f}")
+            print(f"BERTScore   CPG: {cpg_metrics['bertscore']:.4f}")
+            print(f"LengthRatio CPG: {cpg_metrics['length_ratio']:.4f}")
+            print(f"Latency     CPG: {cpg_time:.4f}s")
+
+            print("=" * 60)
+            return
 
-        # -------- LLM --------
-        print("\nRunning LLM Baseline...")
+        # -------- CPG + LLM (concurrently) --------
+        print("\nRunning Custom Paraphrase Generator and LLM Baseline...")
         start = time.time()
-        llm_output = self.llm.paraphrase_paragraph(input_text, min_length_ratio)
-        llm_time = time.time() - start
+        (cpg_output, cpg_time), (llm_output, llm_time) = asyncio.run(
+            self._run_systems(input_text, min_length_ratio)
+        )
+        print(f"Both systems finished in {time.time() - start:.2f}s")
 
         # -------- Evaluation --------
         cpg_metrics = self.evaluator.evaluate_paraphrase(input_text, cpg_output)
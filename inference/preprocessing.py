@@ -0,0 +1,229 @@
+"""
+Shared text preprocessing for generation and evaluation.
+
+Every stage used to tokenize the same document on its own: the generator ran
+NLTK's sent_tokenize (loading the punkt model on first use), BLEU and length
+ratio split on whitespace, ROUGE lowercased, split and stemmed again and the
+error analysis split once more. TextPreprocessor does each of those passes at
+most once per distinct text and keeps the results in an LRU cache bounded by
+entries and by total characters, so a text scored by several metrics is
+tokenized once:
+
+- sentences: rule-based segmentation (no model download, see split_sentences)
+- words: whitespace tokens, as used by BLEU, length ratio and ErrorAnalyzer
+- rouge_tokens: rouge_score's tokenization with a memoized Porter stemmer
+
+Generation and streaming callers segment documents with split_sentences
+directly: each document is seen once there, so caching it would only keep
+whole documents alive. The regexes and abbreviation list are compiled at
+import time and the stemmer is created once per preprocessor, so no stage
+pays a lazy model load.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+# Words that end with a period without ending the sentence
+_ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'mt', 'vs', 'etc', 'e.g', 'i.e', 'cf',
+    'al', 'ed', 'eds', 'approx', 'est', 'dept', 'univ',
+    'inc', 'ltd', 'co', 'corp', 'gov', 'gen', 'col', 'lt', 'sgt', 'capt', 'rev', 'hon',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+    'u.s', 'u.k', 'u.n', 'e.u', 'ph.d', 'b.sc', 'm.sc'
+})
+
+# Abbreviations only when a number follows ("no. 5", "Fig. 3"); "The vote was no." ends a sentence
+_NUMBER_ABBREVIATIONS = frozenset({'no', 'nos', 'fig', 'figs', 'vol', 'pp'})
+
+# Terminal punctuation, optional closing quotes/brackets, then whitespace
+_BOUNDARY_RE = re.compile(r'[.!?]+[\"\'”’)\]]*\s+')
+_BLANK_LINE_RE = re.compile(r'\n\s*\n')
+_LAST_WORD_RE = re.compile(r'(?:(\S+)\s+)?([\w.]+)\.$')
+
+
+def _is_boundary(text, end, match):
+    """Whether the punctuation run of match ends a sentence."""
+    following = text[match.end():match.end() + 1]
+    # A lowercase continuation ("e.g. the", "approx. five") is never a new sentence
+    if not following or following.islower():
+        return False
+
+    punctuation = match.group().rstrip()
+    if not punctuation.startswith('.') or punctuation.startswith('..'):
+        return True
+
+    # Only look a short way back so long documents stay linear
+    last = _LAST_WORD_RE.search(text, max(0, end - 48), end + 1)
+    if last is None:
+        return True
+    previous, word = last.groups()
+    if len(word) == 1 and word.isalpha():
+        return not _is_initial(word, previous, following)
+
+    word = word.lower()
+    if word in _NUMBER_ABBREVIATIONS:
+        return not following.isdigit()
+    return word not in _ABBREVIATIONS
+
+
+def _is_initial(letter, previous, following):
+    """
+    Whether "X." is a name initial rather than a word ending a sentence.
+
+    Only a capital letter followed by a capitalised word counts, and only
+    when it starts the text or follows a capitalised word or another
+    initial ("J. R. R. Tolkien", "George W. Bush"); "vitamin D. It" ends
+    a sentence.
+    """
+    if not letter.isupper() or not following.isupper():
+        return False
+    return previous is None or previous[0].isupper() or previous.endswith('.')
+
+
+def split_sentences(text):
+    """
+    Split text into sentences with punctuation and abbreviation rules.
+
+    A sentence ends at '.', '!' or '?' (plus closing quotes or brackets)
+    followed by whitespace and a non-lowercase character, unless the period
+    belongs to an abbreviation or an initial. Blank lines always end a
+    sentence. Single line breaks are treated as spaces.
+    """
+    sentences = []
+    for block in _BLANK_LINE_RE.split(text):
+        start = 0
+        for match in _BOUNDARY_RE.finditer(block):
+            if _is_boundary(block, match.start(), match):
+                sentence = block[start:match.end()].strip()
+                if sentence:
+                    sentences.append(sentence)
+                start = match.end()
+
+        sentence = block[start:].strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+class _MemoizedStemmer:
+    """Porter stemmer that stems each distinct word only once."""
+
+    def __init__(self):
+        from nltk.stem import porter
+        self._stemmer = porter.PorterStemmer()
+        self._stems = {}
+
+    def stem(self, word):
+        stem = self._stems.get(word)
+        if stem is None:
+            stem = self._stems[word] = self._stemmer.stem(word)
+        return stem
+
+
+class ProcessedText:
+    """Segmentation and tokenizations of one text, each computed on first access."""
+
+    __slots__ = ('text', '_preprocessor', '_sentences', '_words', '_rouge_tokens')
+
+    def __init__(self, text, preprocessor):
+        self.text = text
+        self._preprocessor = preprocessor
+        self._sentences = None
+        self._words = None
+        self._rouge_tokens = None
+
+    @property
+    def sentences(self):
+        if self._sentences is None:
+            self._sentences = split_sentences(self.text)
+        return self._sentences
+
+    @property
+    def words(self):
+        if self._words is None:
+            self._words = self.text.split()
+        return self._words
+
+    @property
+    def rouge_tokens(self):
+        if self._rouge_tokens is None:
+            self._rouge_tokens = self._preprocessor.rouge_tokenize(self.text)
+        return self._rouge_tokens
+
+
+class TextPreprocessor:
+    def __init__(self, max_entries=4096, max_chars=4000000):
+        """
+        Cache of ProcessedText objects for the most recent texts.
+
+        At most max_entries texts totalling max_chars characters are kept;
+        longer texts are processed without being cached. Thread-safe, so the
+        HTTP service can share one instance between request threads.
+        """
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self._stemmer = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stemmer(self):
+        if self._stemmer is None:
+            self._stemmer = _MemoizedStemmer()
+        return self._stemmer
+
+    def rouge_tokenize(self, text):
+        """Same tokens as rouge_score's tokenizer with use_stemmer=True."""
+        from rouge_score import tokenize as rouge_tokenize
+        return rouge_tokenize.tokenize(text, self.stemmer)
+
+    def tokenize(self, text):
+        """rouge_score Tokenizer interface, served from the cache."""
+        return self.process(text).rouge_tokens
+
+    def process(self, text):
+        with self._lock:
+            processed = self._entries.get(text)
+            if processed is not None:
+                self._entries.move_to_end(text)
+                self.hits += 1
+                return processed
+
+            self.misses += 1
+            processed = ProcessedText(text, self)
+            if len(text) > self.max_chars:
+                return processed
+
+            self._entries[text] = processed
+            self._chars += len(text)
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                evicted, _ = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+            return processed
+
+    def sentences(self, text):
+        return self.process(text).sentences
+
+    def words(self, text):
+        return self.process(text).words
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "chars": self._chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+_default_preprocessor = TextPreprocessor()
+
+
+def get_preprocessor():
+    """The process-wide preprocessor shared by generation and evaluation."""
+    return _default_preprocessor
@@ -0,0 +1,166 @@
+"""
+Per-stage timing spans for the paraphrase pipeline.
+
+Pipeline code wraps each stage in ``span("stage.name")``. Spans are sent to
+the active collector, which is a no-op until one is installed with
+set_collector():
+
+- HistogramCollector keeps in-memory latency histograms per stage and can be
+  rendered in the Prometheus text format with to_prometheus().
+- TorchProfilerCollector additionally labels each span with
+  torch.profiler.record_function so stages show up in torch_trace() traces.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Collector:
+    """Base collector: times spans and passes them to record()."""
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        pass
+
+
+class NullCollector(Collector):
+    @contextmanager
+    def span(self, name):
+        yield
+
+
+class _Histogram:
+    def __init__(self, buckets, max_samples):
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+
+class HistogramCollector(Collector):
+    def __init__(self, buckets=DEFAULT_BUCKETS, max_samples=10000):
+        """
+        In-memory latency histograms keyed by stage name.
+
+        Besides fixed Prometheus-style buckets, the most recent max_samples
+        durations per stage are kept for exact percentiles in summary().
+        """
+        self.buckets = tuple(buckets)
+        self.max_samples = max_samples
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram(self.buckets, self.max_samples)
+
+            histogram.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+            histogram.samples.append(seconds)
+
+    def summary(self):
+        """Per-stage count, total, mean and p50/p90/p99 (seconds)."""
+        with self._lock:
+            snapshot = {name: (h.count, h.sum, sorted(h.samples)) for name, h in self._histograms.items()}
+
+        summary = {}
+        for name, (count, total, samples) in snapshot.items():
+            def percentile(q):
+                return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+            summary[name] = {
+                "count": count,
+                "total": total,
+                "mean": total / count,
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99)
+            }
+        return summary
+
+    def to_prometheus(self, metric="paraphrase_stage_seconds"):
+        """Render all histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {metric} Time spent in each paraphrase pipeline stage.",
+            f"# TYPE {metric} histogram"
+        ]
+
+        with self._lock:
+            for name in sorted(self._histograms):
+                histogram = self._histograms[name]
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), histogram.bucket_counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {histogram.sum}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+    def print_summary(self):
+        print("\n" + "=" * 72)
+        print(f"{'Stage':<24} {'Count':<8} {'Total (s)':<11} {'p50 (ms)':<10} {'p99 (ms)':<10}")
+        print("-" * 72)
+        for name, stats in sorted(self.summary().items()):
+            print(f"{name:<24} {stats['count']:<8} {stats['total']:<11.3f} "
+                  f"{stats['p50'] * 1000:<10.2f} {stats['p99'] * 1000:<10.2f}")
+        print("=" * 72)
+
+
+class TorchProfilerCollector(HistogramCollector):
+    """Histogram collector whose spans are also labelled in torch.profiler traces."""
+
+    @contextmanager
+    def span(self, name):
+        from torch.profiler import record_function
+
+        with record_function(name):
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def torch_trace(path, with_stack=False):
+    """Run the enclosed code under torch.profiler and export a Chrome trace to path."""
+    from torch.profiler import ProfilerActivity, profile
+
+    with profile(activities=[ProfilerActivity.CPU], record_shapes=True, with_stack=with_stack) as prof:
+        yield prof
+    prof.export_chrome_trace(path)
+
+
+_collector = NullCollector()
+
+
+def set_collector(collector):
+    """Install the collector that receives all spans; returns the previous one."""
+    global _collector
+    previous, _collector = _collector, collector or NullCollector()
+    return previous
+
+
+def get_collector():
+    return _collector
+
+
+def span(name):
+    """Time the enclosed block as pipeline stage name."""
+    return _collector.span(name)
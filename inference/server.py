@@ -0,0 +1,252 @@
+"""
+HTTP paraphrase service with dynamic micro-batching.
+
+Concurrent requests are split into sentences and queued. A single batching
+thread flushes the queue into one generate call whenever max_batch_size
+sentences are waiting or the oldest one has waited max_wait_ms. A bounded
+queue provides backpressure (HTTP 503) and every request has a timeout
+(HTTP 504). Per-stage latency histograms are exposed at /metrics in the
+Prometheus text format.
+
+PUT /documents/<doc_id> paraphrases a revision of a stored document and only
+regenerates the sentences that changed since the previous revision.
+
+Usage:
+    python -m inference.server --port 5000 --max-batch-size 16 --max-wait-ms 10
+    curl -X POST localhost:5000/paraphrase -H 'Content-Type: application/json' \\
+         -d '{"text": "The quick brown fox jumps over the lazy dog."}'
+    curl -X PUT localhost:5000/documents/doc-1 -H 'Content-Type: application/json' \\
+         -d '{"text": "First sentence. Second sentence."}'
+"""
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from flask import Flask, Response, jsonify, request
+
+from inference.profiling import HistogramCollector, get_collector, set_collector
+from inference.sessions import DocumentSessions
+
+
+class Overloaded(Exception):
+    """Raised when the batching queue is full."""
+
+
+class MicroBatcher:
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=10, max_queue_size=1024):
+        """
+        Collect submitted items into batches for process_batch.
+
+        process_batch receives a list of items and must return a list of
+        results in the same order.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches_run = 0
+        self.items_run = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def submit_many(self, items):
+        """
+        Queue items and return one Future per item.
+
+        Raises Overloaded (and cancels anything already queued for this call)
+        if the queue cannot take all of them.
+        """
+        futures = []
+        try:
+            for item in items:
+                future = Future()
+                self._queue.put_nowait((item, future))
+                futures.append(future)
+        except queue.Full:
+            for future in futures:
+                future.cancel()
+            raise Overloaded("paraphrase queue is full")
+
+        return futures
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Requests that timed out while queued have been cancelled; skip them
+        return [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                results = self.process_batch([item for item, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            self.batches_run += 1
+            self.items_run += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+
+
+def create_app(generator, max_batch_size=16, max_wait_ms=10, max_queue_size=1024,
+               request_timeout=30.0, max_documents=1000):
+    app = Flask(__name__)
+
+    batcher = MicroBatcher(
+        lambda sentences: generator.paraphrase_sentences(sentences, batch_size=max_batch_size),
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+        max_queue_size=max_queue_size
+    )
+    app.config["BATCHER"] = batcher
+
+    def paraphrase_batched(sentences):
+        """Send sentences through the batcher and wait for them within the request timeout."""
+        deadline = time.time() + request_timeout
+        futures = batcher.submit_many(sentences)
+        try:
+            return [f.result(timeout=max(0.0, deadline - time.time())) for f in futures]
+        except TimeoutError:
+            for future in futures:
+                future.cancel()
+            raise
+
+    sessions = DocumentSessions(generator._split_sentences, paraphrase_batched, max_documents)
+    app.config["SESSIONS"] = sessions
+
+    def read_text():
+        payload = request.get_json(silent=True) or {}
+        text = payload.get("text")
+        return text if isinstance(text, str) else None
+
+    def run_guarded(fn):
+        try:
+            return fn(), 200
+        except Overloaded as exc:
+            return {"error": str(exc)}, 503
+        except TimeoutError:
+            return {"error": "request timed out"}, 504
+        except Exception as exc:
+            return {"error": f"generation failed: {exc}"}, 500
+
+    @app.route("/paraphrase", methods=["POST"])
+    def paraphrase():
+        start = time.time()
+        text = read_text()
+        if text is None:
+            return jsonify({"error": "request body must be JSON with a 'text' string"}), 400
+
+        body, status = run_guarded(lambda: paraphrase_batched(generator._split_sentences(text)))
+        if status != 200:
+            headers = {"Retry-After": "1"} if status == 503 else {}
+            return jsonify(body), status, headers
+
+        return jsonify({"paraphrase": " ".join(body), "latency": time.time() - start})
+
+    @app.route("/documents/<doc_id>", methods=["PUT"])
+    def paraphrase_document(doc_id):
+        text = read_text()
+        if text is None:
+            return jsonify({"error": "request body must be JSON with a 'text' string"}), 400
+
+        body, status = run_guarded(lambda: sessions.paraphrase(doc_id, text))
+        headers = {"Retry-After": "1"} if status == 503 else {}
+        return jsonify(body), status, headers
+
+    @app.route("/documents/<doc_id>", methods=["DELETE"])
+    def forget_document(doc_id):
+        if not sessions.forget(doc_id):
+            return jsonify({"error": f"unknown document '{doc_id}'"}), 404
+        return jsonify({"doc_id": doc_id, "deleted": True})
+
+    @app.route("/health", methods=["GET"])
+    def health():
+        return jsonify({
+            "status": "ok",
+            "queue_size": batcher.qsize(),
+            "batches_run": batcher.batches_run,
+            "sentences_run": batcher.items_run,
+            "documents": len(sessions)
+        })
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        collector = get_collector()
+        if not isinstance(collector, HistogramCollector):
+            return jsonify({"error": "stage metrics are not being collected"}), 404
+        return Response(collector.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPG paraphrase HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--max-queue-size", type=int, default=1024)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--max-documents", type=int, default=1000,
+                        help="Document sessions kept for incremental re-paraphrasing")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Low-memory model loading and reused input buffers")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Shrink batches while resident memory exceeds this")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads for generation")
+    parser.add_argument("--decoding", default="beam", choices=["adaptive", "beam"],
+                        help="adaptive: length windows and beam escalation, faster but different outputs")
+    args = parser.parse_args()
+
+    from models.cpg_model import CustomParaphraseGenerator
+
+    set_collector(HistogramCollector())
+    generator = CustomParaphraseGenerator(decoding=args.decoding, low_memory=args.low_memory,
+                                          memory_budget_mb=args.memory_budget_mb,
+                                          num_threads=args.threads)
+    generator.warmup()
+
+    app = create_app(
+        generator,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_queue_size=args.max_queue_size,
+        request_timeout=args.request_timeout,
+        max_documents=args.max_documents
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
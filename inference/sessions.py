@@ -0,0 +1,121 @@
+"""
+Incremental re-paraphrasing of edited documents.
+
+A DocumentSessions store keeps, per document id, the hashes of the last
+revision's sentences and their paraphrases. When a new revision arrives its
+sentences are diffed against the stored ones with difflib.SequenceMatcher;
+only replaced or inserted sentences are sent to the generator and every
+unchanged sentence reuses its stored output, so the cost of a resubmission
+follows the size of the edit rather than the size of the document.
+
+Usage:
+    sessions = DocumentSessions(cpg._split_sentences, cpg.paraphrase_sentences)
+    first = sessions.paraphrase("doc-1", text)
+    second = sessions.paraphrase("doc-1", edited_text)  # regenerates the edits only
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+
+def sentence_hash(sentence):
+    normalized = " ".join(sentence.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class _Document:
+    def __init__(self, hashes, outputs, params):
+        self.hashes = hashes
+        self.outputs = outputs
+        self.params = params
+        self.revision = 1
+
+
+class DocumentSessions:
+    def __init__(self, split_sentences, paraphrase_sentences, max_documents=1000):
+        """
+        split_sentences maps a text to its sentences; paraphrase_sentences
+        maps a list of sentences to their paraphrases in the same order (and
+        may take min_length_ratio as a keyword). The least recently used
+        documents are dropped beyond max_documents.
+        """
+        self.split_sentences = split_sentences
+        self.paraphrase_sentences = paraphrase_sentences
+        self.max_documents = max_documents
+
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _get(self, doc_id):
+        with self._lock:
+            document = self._documents.get(doc_id)
+            if document is not None:
+                self._documents.move_to_end(doc_id)
+            return document
+
+    def _store(self, doc_id, document):
+        with self._lock:
+            self._documents[doc_id] = document
+            self._documents.move_to_end(doc_id)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+    def forget(self, doc_id):
+        """Drop a document's session; returns whether it existed."""
+        with self._lock:
+            return self._documents.pop(doc_id, None) is not None
+
+    def paraphrase(self, doc_id, text, min_length_ratio=None):
+        """
+        Paraphrase a revision of doc_id, regenerating only edited sentences.
+
+        Returns a dict with the paraphrase, the revision number and how many
+        sentences were regenerated or reused. A change of min_length_ratio
+        invalidates the stored outputs.
+        """
+        start = time.time()
+
+        sentences = self.split_sentences(text)
+        hashes = [sentence_hash(sentence) for sentence in sentences]
+        params = {"min_length_ratio": min_length_ratio}
+
+        previous = self._get(doc_id)
+        if previous is None or previous.params != params:
+            old_hashes, old_outputs = [], []
+        else:
+            old_hashes, old_outputs = previous.hashes, previous.outputs
+
+        outputs = [None] * len(sentences)
+        regenerate = []
+        matcher = SequenceMatcher(a=old_hashes, b=hashes, autojunk=False)
+        for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+            if tag == "equal":
+                outputs[new_start:new_end] = old_outputs[old_start:old_end]
+            elif tag in ("replace", "insert"):
+                regenerate.extend(range(new_start, new_end))
+
+        if regenerate:
+            kwargs = {} if min_length_ratio is None else {"min_length_ratio": min_length_ratio}
+            generated = self.paraphrase_sentences([sentences[i] for i in regenerate], **kwargs)
+            for index, output in zip(regenerate, generated):
+                outputs[index] = output
+
+        document = _Document(hashes, outputs, params)
+        if previous is not None:
+            document.revision = previous.revision + 1
+        self._store(doc_id, document)
+
+        return {
+            "doc_id": doc_id,
+            "revision": document.revision,
+            "paraphrase": " ".join(outputs),
+            "sentences": len(sentences),
+            "regenerated": len(regenerate),
+            "reused": len(sentences) - len(regenerate),
+            "latency": time.time() - start
+        }
@@ -0,0 +1,82 @@
+"""
+Inference backends for the CPG model.
+
+Every backend returns an object exposing the Hugging Face generate() API,
+so CustomParaphraseGenerator can swap them without changing its decode path:
+
+- "torch": fp32 T5ForConditionalGeneration (the original behaviour)
+- "int8":  dynamic int8 quantization of every nn.Linear, CPU only
+- "onnx":  exported encoder/decoder with KV-cache run by onnxruntime on CPU
+"""
+import os
+
+import torch
+from transformers import T5ForConditionalGeneration
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+def _from_pretrained(model_name, local_files_only=False, low_memory=False):
+    kwargs = {"local_files_only": local_files_only}
+    if low_memory:
+        # Build the model on the meta device and load weights straight into it
+        # instead of materialising a randomly initialised copy first;
+        # safetensors checkpoints are memory-mapped rather than read into RAM.
+        kwargs["low_cpu_mem_usage"] = True
+    return T5ForConditionalGeneration.from_pretrained(model_name, **kwargs)
+
+
+def _load_torch(model_name, device, local_files_only=False, low_memory=False):
+    model = _from_pretrained(model_name, local_files_only, low_memory).to(device)
+    model.eval()
+    return model
+
+
+def _load_int8(model_name, local_files_only=False, low_memory=False):
+    model = _from_pretrained(model_name, local_files_only, low_memory)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name, export_dir=None, local_files_only=False):
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as exc:
+        raise ImportError(
+            "The onnx backend requires optimum with onnxruntime: "
+            "pip install optimum[onnxruntime]"
+        ) from exc
+
+    if export_dir and os.path.isdir(export_dir):
+        return ORTModelForSeq2SeqLM.from_pretrained(
+            export_dir, use_cache=True, provider="CPUExecutionProvider"
+        )
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        model_name, export=True, use_cache=True, provider="CPUExecutionProvider",
+        local_files_only=local_files_only
+    )
+    if export_dir:
+        model.save_pretrained(export_dir)
+    return model
+
+
+def load_model(model_name, backend="torch", device=None, export_dir=None, local_files_only=False,
+               low_memory=False):
+    """
+    Load model_name with the requested backend.
+
+    The int8 and onnx backends always run on CPU. export_dir lets the onnx
+    backend reuse a previous export instead of re-exporting on every start.
+    local_files_only loads from the Hugging Face cache without network access.
+    low_memory loads torch weights with low_cpu_mem_usage, so peak memory
+    during loading stays close to one copy of the weights.
+    """
+    if backend == "torch":
+        return _load_torch(model_name, device or torch.device("cpu"), local_files_only, low_memory)
+    if backend == "int8":
+        return _load_int8(model_name, local_files_only, low_memory)
+    if backend == "onnx":
+        return _load_onnx(model_name, export_dir, local_files_only)
+
+    raise ValueError(f"Unknown backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
@@ -0,0 +1,46 @@
+def plan_batches(lengths, batch_size=None, max_tokens=None, bucket_width=None):
+    """
+    Group item indices into length-sorted micro-batches.
+
+    Items are ordered by token length so that every batch pads to a similar
+    width. A batch is closed once it holds batch_size items or, when
+    max_tokens is set, once its padded size (items x longest item) would
+    exceed the budget. With bucket_width set, a batch is also closed before
+    its longest item would be bucket_width or more tokens longer than its
+    shortest, so no item carries that much padding. Returns a list of index
+    lists; callers use the indices to put the generated outputs back in their
+    original order.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batches = []
+    current = []
+    longest = 0
+    for index in order:
+        width = max(longest, lengths[index])
+        too_many = batch_size is not None and len(current) >= batch_size
+        too_wide = max_tokens is not None and width * (len(current) + 1) > max_tokens
+        too_uneven = (bucket_width is not None and current
+                      and lengths[index] - lengths[current[0]] >= bucket_width)
+
+        if current and (too_many or too_wide or too_uneven):
+            batches.append(current)
+            current = []
+            width = lengths[index]
+
+        current.append(index)
+        longest = width
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def padding_tokens(lengths, batches):
+    """Number of pad tokens the batches add (longest x size - actual tokens)."""
+    total = 0
+    for batch in batches:
+        batch_lengths = [lengths[i] for i in batch]
+        total += max(batch_lengths) * len(batch_lengths) - sum(batch_lengths)
+    return total
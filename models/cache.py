@@ -0,0 +1,96 @@
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+
+
+class ParaphraseCache:
+    """
+    Content-addressed cache of sentence paraphrases.
+
+    Entries are keyed on the normalized sentence, the model name and the
+    generation parameters. Lookups go to an in-memory LRU tier first and,
+    when a path is given, fall back to a SQLite tier that survives restarts.
+    """
+
+    def __init__(self, capacity=10000, path=None):
+        self.capacity = capacity
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS paraphrases (key TEXT PRIMARY KEY, output TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def normalize(sentence):
+        return " ".join(sentence.split())
+
+    def make_key(self, sentence, model_name, params):
+        payload = json.dumps(
+            [self.normalize(sentence), model_name, params],
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, output):
+        self._entries[key] = output
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached paraphrase for key, or None on a miss."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT output FROM paraphrases WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self.hits += 1
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def put_many(self, items):
+        """Store (key, output) pairs in both tiers."""
+        items = list(items)
+        for key, output in items:
+            self._remember(key, output)
+
+        if self._db is not None and items:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO paraphrases (key, output) VALUES (?, ?)", items
+            )
+            self._db.commit()
+
+    def put(self, key, output):
+        self.put_many([(key, output)])
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._entries)
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,78 @@
+"""
+Clause-level chunking for sentences longer than the model's input limit.
+
+sent_tokenize can return sentences that do not fit in max_length tokens;
+truncating them silently drops the end of the sentence. Such sentences are
+instead split at clause boundaries (punctuation, then coordinating and
+subordinating conjunctions, then plain word breaks as a last resort), the
+chunks are paraphrased independently and stitched back together.
+"""
+import re
+
+CLAUSE_BOUNDARY = re.compile(
+    r"(?<=[,;:])\s+"
+    r"|\s+(?=(?:and|but|or|so|yet|because|while|whereas|although|though|which|who|where|when)\b)"
+)
+
+
+def split_clauses(sentence):
+    return [clause for clause in CLAUSE_BOUNDARY.split(sentence) if clause]
+
+
+def _pack(units, max_tokens):
+    chunks = []
+    current = []
+    current_tokens = 0
+    for text, tokens in units:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def chunk_sentence(sentence, count_tokens, max_tokens):
+    """
+    Split sentence into chunks of at most max_tokens tokens.
+
+    count_tokens maps a list of strings to their token counts. Adjacent
+    clauses are packed greedily so chunks are as long as the budget allows;
+    a clause that is too long on its own is packed word by word. A single
+    word longer than max_tokens becomes its own (still too long) chunk.
+    """
+    clauses = split_clauses(sentence)
+
+    units = []
+    for clause, tokens in zip(clauses, count_tokens(clauses)):
+        if tokens <= max_tokens:
+            units.append((clause, tokens))
+        else:
+            words = clause.split()
+            pieces = _pack(list(zip(words, count_tokens(words))), max_tokens)
+            units.extend(zip(pieces, count_tokens(pieces)))
+
+    return _pack(units, max_tokens)
+
+
+def stitch_chunks(chunks, outputs):
+    """
+    Join the paraphrases of a sentence's chunks into one sentence.
+
+    The model ends every output as a full sentence, so the final stop of all
+    but the last chunk is replaced by the punctuation the source chunk ended
+    with.
+    """
+    parts = []
+    for position, (chunk, output) in enumerate(zip(chunks, outputs)):
+        output = output.strip()
+        if position < len(chunks) - 1:
+            output = output.rstrip(".!?")
+            if chunk[-1] in ",;:":
+                output += chunk[-1]
+        parts.append(output)
+    return " ".join(parts)
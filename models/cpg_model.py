@@ -1,53 +1,520 @@
 import torch
 import time
-from transformers import T5ForConditionalGeneration, T5Tokenizer
-from nltk.tokenize import sent_tokenize
+from transformers import T5Tokenizer
+
+from inference.preprocessing import split_sentences
+from inference.profiling import span
+from models.backends import load_model
+from models.batching import padding_tokens, plan_batches
+from models.chunking import chunk_sentence, stitch_chunks
+from models.decoding import DecodingController
+from models.memory import InputBufferPool, MemoryBudget, configure_allocator
+from models.speculative import build_speculative_decoder
 
 
 class CustomParaphraseGenerator:
-    def __init__(self, model_name="Vamsi/T5_Paraphrase_Paws"):
+    def __init__(self, model_name="Vamsi/T5_Paraphrase_Paws", batch_size=8, cache=None,
+                 backend="torch", export_dir=None, decoding="beam", bucket_width=16,
+                 speculative=None, local_files_only=False, reranker=None, low_memory=False,
+                 memory_budget_mb=None, num_threads=None):
+        """
+        decoding="beam" (the default) runs the fixed num_beams / max_length
+        search for every sentence. decoding="adaptive" opts into sizing each
+        sentence's output window from its source length and escalating beams
+        only for sentences that miss the length target (see
+        models/decoding.py); it is faster but changes the outputs.
+
+        bucket_width bounds the token-length spread within a batch (see
+        plan_batches); None batches purely by batch_size / max_batch_tokens.
+
+        speculative ("prompt_lookup" or a draft model name) replaces every
+        greedy generate call with draft-and-verify decoding (see
+        models/speculative.py). local_files_only loads all weights from the
+        local Hugging Face cache without network access.
+
+        reranker (a models.reranking.CandidateReranker) keeps its
+        num_candidates beams per sentence from every beam-search call and
+        returns the one that scores best under its objective.
+
+        low_memory loads weights with low_cpu_mem_usage, caps malloc arenas,
+        refills preallocated input tensors per bucketed batch shape and keeps
+        only one batch of documents in flight. memory_budget_mb shrinks the
+        padded-token size of batches while resident memory is over budget
+        (see models/memory.py). num_threads sets the torch thread count.
+        """
+        if decoding not in ("adaptive", "beam"):
+            raise ValueError(f"Unknown decoding mode {decoding!r}; expected 'adaptive' or 'beam'")
+        if speculative is not None and backend == "onnx":
+            raise ValueError("Speculative decoding requires the torch or int8 backend")
+
         print("USING SENTENCE-LEVEL FINETUNED PARAPHRASE MODEL")
 
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        if low_memory:
+            configure_allocator()
+
+        if backend == "torch" and torch.cuda.is_available():
+            self.device = torch.device("cuda")
+        else:
+            self.device = torch.device("cpu")
+
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.bucket_width = bucket_width
+        self.max_length = 128
+        self.num_beams = 5
+        self.cache = cache
+        self.reranker = reranker
+        self.decoding = DecodingController() if decoding == "adaptive" else None
+        self.last_decoding_stats = None
+        self.last_stats = None
+        self.low_memory = low_memory
+        self.memory_budget = MemoryBudget(memory_budget_mb) if memory_budget_mb else None
 
-        self.tokenizer = T5Tokenizer.from_pretrained(model_name)
-        self.model = T5ForConditionalGeneration.from_pretrained(model_name).to(self.device)
+        self.tokenizer = T5Tokenizer.from_pretrained(model_name, local_files_only=local_files_only)
+        # Tokens added around every sentence by the "paraphrase: ... </s>" prompt
+        self._prompt_tokens = len(self._tokenize([""])[0])
+        self.model = load_model(model_name, backend, self.device, export_dir, local_files_only,
+                                low_memory)
+        self.input_buffers = None
+        if low_memory:
+            self.input_buffers = InputBufferPool(self.tokenizer.pad_token_id, bucket_width, self.device)
+
+        self.speculative_draft = speculative
+        self.speculative = None
+        if speculative is not None:
+            self.speculative = build_speculative_decoder(
+                self.model, speculative, self.device, local_files_only
+            )
 
-        self.model.eval()
-        print(f"Model loaded on {self.device}")
+        print(f"Model loaded on {self.device} ({backend} backend)")
 
-    def paraphrase_paragraph(self, paragraph, min_length_ratio=0.8):
+    def warmup(self):
+        """Run one dummy generate so the first real request is not a cold start."""
         start_time = time.time()
+        self._generate_batch(self._tokenize(["This sentence warms up the model."]))
+        print(f"CPG warm-up generate took {time.time() - start_time:.2f}s")
 
-        sentences = sent_tokenize(paragraph)
-        paraphrased_sentences = []
+    def _split_sentences(self, paragraph):
+        with span("cpg.sentence_split"):
+            return split_sentences(paragraph)
 
-        for sentence in sentences:
-            input_text = "paraphrase: " + sentence + " </s>"
+    def _count_tokens(self, texts):
+        """Token counts of texts without the prompt or special tokens."""
+        if not texts:
+            return []
+        encoding = self.tokenizer(texts, add_special_tokens=False)
+        return [len(ids) for ids in encoding["input_ids"]]
 
+    def _tokenize(self, sentences):
+        if not sentences:
+            return []
+
+        input_texts = ["paraphrase: " + sentence + " </s>" for sentence in sentences]
+
+        with span("cpg.tokenize"):
             encoding = self.tokenizer(
-                input_text,
-                return_tensors="pt",
+                input_texts,
                 truncation=True,
-                max_length=128
+                max_length=self.max_length
+            )
+        return encoding["input_ids"]
+
+    def _generate_batch(self, batch_input_ids, num_beams=None, windows=None, sources=None):
+        """
+        Run one padded beam-search generate call over pre-tokenized inputs.
+
+        For torch backends the encoder is run separately so its cost is
+        reported apart from beam-search decoding; generate() then reuses
+        the precomputed encoder outputs. windows optionally gives a
+        (min_new_tokens, max_new_tokens) pair per input in place of the
+        fixed max_length. With a reranker and the source sentences, several
+        beams are returned per input and the reranker picks one.
+        """
+        num_beams = num_beams or self.num_beams
+        if self.speculative is not None and num_beams == 1:
+            return self._generate_speculative(batch_input_ids, windows)
+
+        with span("cpg.tokenize"):
+            if self.input_buffers is not None:
+                input_ids, attention_mask = self.input_buffers.fill(batch_input_ids)
+            else:
+                encoding = self.tokenizer.pad(
+                    {"input_ids": batch_input_ids},
+                    return_tensors="pt"
+                )
+
+                input_ids = encoding["input_ids"].to(self.device)
+                attention_mask = encoding["attention_mask"].to(self.device)
+
+        if windows is None:
+            generate_kwargs = {"max_length": self.max_length}
+        else:
+            generate_kwargs = {
+                "max_new_tokens": max(high for _, high in windows),
+                "logits_processor": self.decoding.logits_processor(
+                    windows, self.tokenizer.eos_token_id, num_beams
+                )
+            }
+        if num_beams > 1:
+            generate_kwargs["early_stopping"] = True
+
+        num_candidates = 1
+        if self.reranker is not None and sources is not None and num_beams > 1:
+            num_candidates = min(self.reranker.num_candidates, num_beams)
+            generate_kwargs.update(
+                num_return_sequences=num_candidates,
+                output_scores=True,
+                return_dict_in_generate=True
             )
 
-            input_ids = encoding["input_ids"].to(self.device)
-            attention_mask = encoding["attention_mask"].to(self.device)
+        if self.backend in ("torch", "int8"):
+            with span("cpg.encoder_forward"), torch.inference_mode():
+                generate_kwargs["encoder_outputs"] = self.model.get_encoder()(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    return_dict=True
+                )
 
+        with span("cpg.decode"), torch.inference_mode():
             outputs = self.model.generate(
                 input_ids=input_ids,
                 attention_mask=attention_mask,
-                max_length=128,
-                num_beams=5,
-                early_stopping=True
+                num_beams=num_beams,
+                **generate_kwargs
             )
 
-            decoded = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            paraphrased_sentences.append(decoded)
+        if num_candidates == 1:
+            with span("cpg.detokenize"):
+                return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+        with span("cpg.detokenize"):
+            candidates = self.tokenizer.batch_decode(outputs.sequences, skip_special_tokens=True)
+        with span("cpg.rerank"):
+            return self.reranker.select(sources, candidates, outputs.sequences_scores.tolist(),
+                                        num_candidates)
+
+    def _generate_speculative(self, batch_input_ids, windows=None):
+        """Greedy draft-and-verify decoding, one input at a time."""
+        outputs = []
+        for position, ids in enumerate(batch_input_ids):
+            if windows is None:
+                # generate(max_length=...) counts the decoder start token
+                min_new_tokens, max_new_tokens = 0, self.max_length - 1
+            else:
+                min_new_tokens, max_new_tokens = windows[position]
+            input_ids = torch.tensor([ids], device=self.device)
+
+            with span("cpg.decode"), torch.inference_mode():
+                outputs.append(self.speculative.generate(
+                    input_ids, torch.ones_like(input_ids), min_new_tokens, max_new_tokens,
+                    force_eos=windows is not None
+                ))
+
+        with span("cpg.detokenize"):
+            return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def _plan_batches(self, lengths, batch_size, max_batch_tokens):
+        if self.memory_budget is not None:
+            return self._plan_budgeted_batches(lengths, batch_size, max_batch_tokens)
+
+        batches = plan_batches(lengths, batch_size, max_batch_tokens, self.bucket_width)
+        if self.last_stats is not None:
+            self.last_stats["input_tokens"] += sum(lengths)
+            self.last_stats["padding_tokens"] += padding_tokens(lengths, batches)
+        return batches
+
+    def _plan_budgeted_batches(self, lengths, batch_size, max_batch_tokens):
+        """
+        Yield batches sized by the memory budget.
+
+        The budget is checked after each batch has been generated (when the
+        caller asks for the next one); if it changed the token limit, the
+        remaining items are re-planned under the new limit.
+        """
+        ceiling = max_batch_tokens or (batch_size or self.batch_size) * self.max_length
+        remaining = list(range(len(lengths)))
+
+        while remaining:
+            limit = self.memory_budget.batch_tokens(ceiling)
+            batches = plan_batches([lengths[i] for i in remaining], batch_size, limit,
+                                   self.bucket_width)
+
+            done = set()
+            for batch in batches:
+                batch = [remaining[i] for i in batch]
+                if self.last_stats is not None:
+                    self.last_stats["input_tokens"] += sum(lengths[i] for i in batch)
+                    self.last_stats["padding_tokens"] += padding_tokens(lengths, [batch])
+
+                yield batch
+                done.update(batch)
+                if self.memory_budget.check(ceiling):
+                    break
+
+            remaining = [i for i in remaining if i not in done]
+
+    def _generate_all(self, all_input_ids, sentences, batch_size=None, max_batch_tokens=None,
+                      min_length_ratio=None):
+        if self.decoding is not None:
+            return self._generate_adaptive(all_input_ids, sentences, batch_size,
+                                           max_batch_tokens, min_length_ratio)
+
+        lengths = [len(ids) for ids in all_input_ids]
+
+        outputs = [None] * len(all_input_ids)
+        for batch in self._plan_batches(lengths, batch_size, max_batch_tokens):
+            decoded = self._generate_batch([all_input_ids[i] for i in batch],
+                                           sources=[sentences[i] for i in batch])
+            for index, text in zip(batch, decoded):
+                outputs[index] = text
+
+        return outputs
+
+    def _generate_adaptive(self, all_input_ids, sentences, batch_size, max_batch_tokens,
+                           min_length_ratio):
+        """
+        Decode through the controller's beam schedule.
+
+        Every sentence is decoded at the first (cheapest) beam width; only
+        sentences whose output is still shorter than min_length_ratio of the
+        source words are re-decoded at the next width. The longest output seen
+        for a sentence is kept if it never reaches the target.
+        """
+        lengths = [len(ids) for ids in all_input_ids]
+        windows = [
+            self.decoding.token_window(max(1, length - self._prompt_tokens), self.max_length,
+                                       min_length_ratio)
+            for length in lengths
+        ]
+
+        outputs = [None] * len(all_input_ids)
+        pending = list(range(len(all_input_ids)))
+        decoded_per_beam_width = {}
+        for num_beams in self.decoding.beam_schedule:
+            decoded_per_beam_width[num_beams] = len(pending)
+
+            for batch in self._plan_batches([lengths[i] for i in pending], batch_size,
+                                            max_batch_tokens):
+                batch = [pending[i] for i in batch]
+                decoded = self._generate_batch([all_input_ids[i] for i in batch], num_beams,
+                                               [windows[i] for i in batch],
+                                               [sentences[i] for i in batch])
+                for index, text in zip(batch, decoded):
+                    if outputs[index] is None or len(text.split()) > len(outputs[index].split()):
+                        outputs[index] = text
 
-        final_output = " ".join(paraphrased_sentences)
+            pending = [
+                i for i in pending
+                if not self.decoding.meets_target(sentences[i], outputs[i], min_length_ratio)
+            ]
+            if not pending:
+                break
+
+        self.last_decoding_stats = {
+            "sentences": len(all_input_ids),
+            "decoded_per_beam_width": decoded_per_beam_width,
+            "below_target": len(pending)
+        }
+        return outputs
+
+    def _generation_params(self, min_length_ratio=None):
+        params = {"max_length": self.max_length, "num_beams": self.num_beams, "backend": self.backend}
+        if self.decoding is not None:
+            params["decoding"] = self.decoding.params(min_length_ratio)
+        if self.speculative is not None:
+            params["speculative"] = self.speculative_draft
+        if self.reranker is not None:
+            params["reranker"] = self.reranker.params()
+        return params
+
+    def _chunk_long_sentences(self, sentences):
+        """
+        Split sentences that do not fit in max_length tokens into clause chunks.
+
+        Returns the chunks of each sentence as a list of lists (a sentence
+        that fits is its own single chunk) and the number of input tokens
+        that will still be truncated.
+        """
+        budget = self.max_length - self._prompt_tokens
+
+        # A sentencepiece token spans at least one character, so only
+        # sentences longer than the budget in characters can be too long
+        candidates = [i for i, sentence in enumerate(sentences) if len(sentence) > budget]
+        counts = self._count_tokens([sentences[i] for i in candidates])
+
+        chunked = [[sentence] for sentence in sentences]
+        truncated = 0
+        for index, tokens in zip(candidates, counts):
+            if tokens <= budget:
+                continue
+            chunked[index] = chunk_sentence(sentences[index], self._count_tokens, budget)
+            truncated += sum(max(0, n - budget) for n in self._count_tokens(chunked[index]))
+
+        return chunked, truncated
+
+    def _paraphrase_cached(self, sentences, all_input_ids=None, batch_size=None,
+                           max_batch_tokens=None, min_length_ratio=None):
+        """
+        Paraphrase sentences, chunking any that exceed the token limit.
+
+        Over-long sentences are split at clause boundaries, the chunks are
+        generated alongside the other sentences and the chunk outputs are
+        stitched back into one sentence. Token counts for the call (chunked
+        sentences, truncated, input and padding tokens) are kept in
+        self.last_stats.
+        """
+        chunked, truncated = self._chunk_long_sentences(sentences)
+        self.last_stats = {
+            "sentences": len(sentences),
+            "chunked_sentences": sum(1 for chunks in chunked if len(chunks) > 1),
+            "chunks": sum(len(chunks) for chunks in chunked),
+            "truncated_tokens": truncated,
+            "input_tokens": 0,
+            "padding_tokens": 0
+        }
+
+        if self.last_stats["chunks"] == len(sentences):
+            return self._paraphrase_pieces(sentences, all_input_ids, batch_size,
+                                           max_batch_tokens, min_length_ratio)
+
+        pieces = [chunk for chunks in chunked for chunk in chunks]
+        if all_input_ids is not None:
+            piece_input_ids = []
+            for chunks, input_ids in zip(chunked, all_input_ids):
+                piece_input_ids.extend([input_ids] if len(chunks) == 1 else self._tokenize(chunks))
+        else:
+            piece_input_ids = None
+
+        outputs = self._paraphrase_pieces(pieces, piece_input_ids, batch_size,
+                                          max_batch_tokens, min_length_ratio)
+
+        stitched = []
+        position = 0
+        for chunks in chunked:
+            count = len(chunks)
+            if count == 1:
+                stitched.append(outputs[position])
+            else:
+                stitched.append(stitch_chunks(chunks, outputs[position:position + count]))
+            position += count
+        return stitched
+
+    def _paraphrase_pieces(self, sentences, all_input_ids=None, batch_size=None,
+                           max_batch_tokens=None, min_length_ratio=None):
+        """
+        Paraphrase sentences, generating only those not already cached.
+
+        Repeated sentences within the call are generated once. When
+        all_input_ids is given it must be aligned with sentences and saves
+        re-tokenizing the misses.
+        """
+        outputs = [None] * len(sentences)
+        misses = {}
+        params = self._generation_params(min_length_ratio)
+
+        for index, sentence in enumerate(sentences):
+            if self.cache is not None:
+                key = self.cache.make_key(sentence, self.model_name, params)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    outputs[index] = cached
+                    continue
+            else:
+                key = sentence
+            misses.setdefault(key, []).append(index)
+
+        if not misses:
+            return outputs
+
+        first_indices = [indices[0] for indices in misses.values()]
+        if all_input_ids is None:
+            miss_input_ids = self._tokenize([sentences[i] for i in first_indices])
+        else:
+            miss_input_ids = [all_input_ids[i] for i in first_indices]
+
+        generated = self._generate_all(miss_input_ids, [sentences[i] for i in first_indices],
+                                       batch_size, max_batch_tokens, min_length_ratio)
+
+        for indices, text in zip(misses.values(), generated):
+            for index in indices:
+                outputs[index] = text
+
+        if self.cache is not None:
+            self.cache.put_many(zip(misses.keys(), generated))
+
+        return outputs
+
+    def paraphrase_sentences(self, sentences, batch_size=None, max_batch_tokens=None,
+                             min_length_ratio=None):
+        """
+        Paraphrase a list of sentences in length-sorted micro-batches.
+
+        Outputs are returned in the same order as the input sentences.
+        With the default beam decoding, a batch_size of 1 reproduces the
+        original one-call-per-sentence path.
+        min_length_ratio overrides the decoding controller's length target.
+        """
+        batch_size = batch_size or self.batch_size
+        return self._paraphrase_cached(sentences, batch_size=batch_size,
+                                       max_batch_tokens=max_batch_tokens,
+                                       min_length_ratio=min_length_ratio)
+
+    def paraphrase_documents(self, documents, max_batch_tokens=2048, window_tokens=None):
+        """
+        Paraphrase an iterable of documents, packing sentences across documents.
+
+        Documents are read lazily and buffered until about window_tokens input
+        tokens are pending. The buffered sentences are then generated together
+        in batches of at most max_batch_tokens padded tokens, so short documents
+        share batches instead of leaving them mostly empty.
+
+        Yields one paraphrased document per input document, in input order.
+        """
+        if window_tokens is None:
+            # In low-memory mode only one batch worth of documents is buffered
+            window_tokens = max_batch_tokens if self.low_memory else 4 * max_batch_tokens
+
+        pending = []
+        pending_tokens = 0
+        for document in documents:
+            sentences = self._split_sentences(document)
+            input_ids = self._tokenize(sentences)
+            pending.append((sentences, input_ids))
+            pending_tokens += sum(len(ids) for ids in input_ids)
+
+            if pending_tokens >= window_tokens:
+                yield from self._flush_documents(pending, max_batch_tokens)
+                pending = []
+                pending_tokens = 0
+
+        if pending:
+            yield from self._flush_documents(pending, max_batch_tokens)
+
+    def _flush_documents(self, pending, max_batch_tokens):
+        flat_sentences = [sentence for sentences, _ in pending for sentence in sentences]
+        flat_input_ids = [ids for _, input_ids in pending for ids in input_ids]
+        outputs = self._paraphrase_cached(flat_sentences, flat_input_ids,
+                                          max_batch_tokens=max_batch_tokens)
+
+        position = 0
+        for sentences, _ in pending:
+            count = len(sentences)
+            yield " ".join(outputs[position:position + count])
+            position += count
+
+    def paraphrase_paragraph(self, paragraph, min_length_ratio=0.8, batch_size=None):
+        start_time = time.time()
+
+        with span("cpg.paraphrase_paragraph"):
+            sentences = self._split_sentences(paragraph)
+            paraphrased_sentences = self.paraphrase_sentences(
+                sentences, batch_size, min_length_ratio=min_length_ratio
+            )
+
+            final_output = " ".join(paraphrased_sentences)
 
         self.inference_time = time.time() - start_time
         return final_output
-
@@ -1,28 +1,42 @@
+import asyncio
+import random
 import time
 import os
-from openai import OpenAI
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
 
+from inference.profiling import span
+
 load_dotenv()
 
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
 
-class LLMParaphraser:
-    def __init__(self, model_name: str = "gpt-4o-mini"):
-        api_key = os.getenv("OPENAI_API_KEY")
 
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found. Please set it in .env file.")
+def _resolve_api_key(api_key=None, base_url=None):
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
 
-        self.client = OpenAI(api_key=api_key)
-        self.model_name = model_name
+    if not api_key:
+        # Local OpenAI-compatible servers (e.g. the benchmark mock) ignore the key
+        if base_url:
+            return "local"
+        raise ValueError("OPENAI_API_KEY not found. Please set it in .env file.")
 
-    def paraphrase_paragraph(self, paragraph: str, min_length_ratio: float = 0.8) -> str:
-        start_time = time.time()
+    return api_key
 
-        input_words = len(paragraph.split())
-        target_min_words = int(input_words * min_length_ratio)
 
-        prompt = f"""
+def _build_messages(paragraph: str, min_length_ratio: float) -> list:
+    input_words = len(paragraph.split())
+    target_min_words = int(input_words * min_length_ratio)
+
+    prompt = f"""
 Paraphrase the following paragraph while preserving meaning.
 The output must be at least {target_min_words} words.
 
@@ -30,16 +44,141 @@ Paragraph:
 {paragraph}
 """
 
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": "You paraphrase text while preserving meaning."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
+    return [
+        {"role": "system", "content": "You paraphrase text while preserving meaning."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+class LLMParaphraser:
+    def __init__(self, model_name: str = "gpt-4o-mini", api_key: str = None, base_url: str = None):
+        self.client = OpenAI(api_key=_resolve_api_key(api_key, base_url), base_url=base_url)
+        self.model_name = model_name
+
+    def paraphrase_paragraph(self, paragraph: str, min_length_ratio: float = 0.8) -> str:
+        start_time = time.time()
+
+        with span("llm.request"):
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=_build_messages(paragraph, min_length_ratio),
+                temperature=0.7
+            )
+
+        output_text = response.choices[0].message.content.strip()
+
+        self.inference_time = time.time() - start_time
+        return output_text
+
+
+class TokenBucket:
+    """Asyncio token-bucket rate limiter (rate tokens per second, up to capacity)."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class AsyncLLMParaphraser:
+    def __init__(self, model_name: str = "gpt-4o-mini", api_key: str = None, base_url: str = None,
+                 max_concurrency: int = 8, requests_per_second: float = 5.0,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 timeout: float = 60.0):
+        """
+        Async LLM baseline with a pooled HTTP client.
+
+        At most max_concurrency requests are in flight, request starts are
+        rate limited by a token bucket, and retryable API errors are retried
+        with exponential backoff and full jitter.
+        """
+        self.api_key = _resolve_api_key(api_key, base_url)
+        self.base_url = base_url
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        # The pooled client, semaphore and bucket are bound to one event loop
+        self._loop = None
+        self._http_client = None
+
+    def _ensure_client(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._loop = loop
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            ),
+            timeout=self.timeout
+        )
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            http_client=self._http_client,
+            max_retries=0
         )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(self.requests_per_second)
+
+    async def _create_with_retry(self, messages: list):
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            try:
+                return await self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    temperature=0.7
+                )
+            except RETRYABLE_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, delay))
+
+    async def paraphrase_paragraph(self, paragraph: str, min_length_ratio: float = 0.8) -> str:
+        self._ensure_client()
+        start_time = time.time()
+
+        async with self._semaphore:
+            with span("llm.request"):
+                response = await self._create_with_retry(_build_messages(paragraph, min_length_ratio))
 
         output_text = response.choices[0].message.content.strip()
 
         self.inference_time = time.time() - start_time
         return output_text
+
+    async def paraphrase_many(self, paragraphs: list, min_length_ratio: float = 0.8) -> list:
+        """Paraphrase many paragraphs concurrently, returning them in input order."""
+        return await asyncio.gather(
+            *(self.paraphrase_paragraph(p, min_length_ratio) for p in paragraphs)
+        )
+
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._loop = None
@@ -0,0 +1,167 @@
+"""
+Memory controls for running the CPG model under a tight container limit.
+
+- current_rss / peak_rss read resident memory (peak via resource.getrusage)
+- configure_allocator caps glibc malloc arenas so worker threads do not each
+  grow their own heap; release_memory runs gc and returns freed pages to the
+  OS with malloc_trim. Both are no-ops where glibc is not available.
+- InputBufferPool keeps one preallocated input_ids / attention_mask pair per
+  bucketed batch shape and refills it in place for every batch
+- MemoryBudget shrinks the padded-token size of batches while resident memory
+  is over budget and lets it grow back once there is headroom
+
+torch is only imported by InputBufferPool, so the RSS helpers can be used by
+benchmarks that never load the model.
+"""
+import ctypes
+import ctypes.util
+import gc
+import resource
+import sys
+
+# mallopt parameter number from glibc's malloc.h
+M_ARENA_MAX = -8
+
+_libc = None
+
+
+def _glibc():
+    global _libc
+    if _libc is None:
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+            libc.malloc_trim.argtypes = [ctypes.c_size_t]
+            libc.mallopt.argtypes = [ctypes.c_int, ctypes.c_int]
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def current_rss():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2 ** 20
+    except OSError:
+        return peak_rss()
+
+
+def peak_rss():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def configure_allocator(arena_max=2):
+    """Limit the number of malloc arenas. Returns False if it could not be set."""
+    libc = _glibc()
+    if libc is None:
+        return False
+    return bool(libc.mallopt(M_ARENA_MAX, arena_max))
+
+
+def release_memory():
+    """Collect garbage and hand free heap pages back to the OS."""
+    gc.collect()
+    libc = _glibc()
+    if libc is not None:
+        libc.malloc_trim(0)
+
+
+class InputBufferPool:
+    def __init__(self, pad_token_id, bucket_width=16, device=None):
+        """
+        Reusable padded input tensors.
+
+        Batch widths are rounded up to a multiple of bucket_width, so the
+        planner's bucketed batches map onto a handful of fixed shapes and the
+        same storage is refilled instead of allocating new tensors per batch.
+        Returned tensors are only valid until the next fill() call.
+        """
+        import torch
+
+        self.pad_token_id = pad_token_id
+        self.bucket_width = bucket_width or 16
+        self.device = device or torch.device("cpu")
+        self._buffers = {}
+        self.allocations = 0
+
+    def fill(self, batch_input_ids):
+        """Copy token id lists into a buffer; returns (input_ids, attention_mask)."""
+        import torch
+
+        rows = len(batch_input_ids)
+        longest = max(len(ids) for ids in batch_input_ids)
+        width = -(-longest // self.bucket_width) * self.bucket_width
+
+        buffers = self._buffers.get((rows, width))
+        if buffers is None:
+            buffers = self._buffers[(rows, width)] = (
+                torch.empty((rows, width), dtype=torch.long, device=self.device),
+                torch.empty((rows, width), dtype=torch.long, device=self.device)
+            )
+            self.allocations += 1
+
+        input_ids, attention_mask = buffers
+        input_ids.fill_(self.pad_token_id)
+        attention_mask.zero_()
+        for row, ids in enumerate(batch_input_ids):
+            input_ids[row, :len(ids)] = torch.as_tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        return input_ids, attention_mask
+
+    def clear(self):
+        self._buffers.clear()
+
+
+class MemoryBudget:
+    def __init__(self, max_rss_mb, min_batch_tokens=64, headroom=0.75):
+        """
+        Peak-RSS budget for the batch scheduler.
+
+        After every batch check() compares resident memory against
+        max_rss_mb. When over budget it first releases freed memory and, if
+        that is not enough, halves the padded-token limit for the following
+        batches (never below min_batch_tokens). Below headroom x max_rss_mb
+        the limit doubles back towards the configured batch size.
+        """
+        self.max_rss_mb = max_rss_mb
+        self.min_batch_tokens = min_batch_tokens
+        self.headroom = headroom
+        self.limit = None
+        self.shrinks = 0
+        self.releases = 0
+
+    def batch_tokens(self, ceiling):
+        """Padded-token limit for the next batches, at most ceiling."""
+        if self.limit is None or self.limit > ceiling:
+            self.limit = ceiling
+        return self.limit
+
+    def check(self, ceiling):
+        """Re-evaluate the limit after a batch; returns True if it changed."""
+        rss = current_rss()
+        if rss > self.max_rss_mb:
+            release_memory()
+            self.releases += 1
+            rss = current_rss()
+            if rss > self.max_rss_mb and self.limit > self.min_batch_tokens:
+                self.limit = max(self.min_batch_tokens, self.limit // 2)
+                self.shrinks += 1
+                return True
+        elif rss < self.headroom * self.max_rss_mb and self.limit < ceiling:
+            self.limit = min(ceiling, self.limit * 2)
+            return True
+        return False
+
+    def stats(self):
+        return {
+            "max_rss_mb": self.max_rss_mb,
+            "batch_tokens": self.limit,
+            "shrinks": self.shrinks,
+            "releases": self.releases,
+            "peak_rss_mb": peak_rss()
+        }
@@ -0,0 +1,118 @@
+"""
+Evaluator-driven reranking of beam-search candidates.
+
+Instead of keeping only the top beam, generate() returns num_candidates beams
+per sentence. All candidates of a batch are scored together: BLEU diversity
+and length ratio against the source come from the vectorized CorpusEvaluator,
+fidelity is either the model's length-normalized sequence probability or,
+with use_bertscore=True, batched BERTScore against the source. The candidate
+with the highest objective is kept, so quality improves without a second
+round of generate calls.
+"""
+import math
+
+
+class CandidateReranker:
+    def __init__(self, num_candidates=4, fidelity_weight=1.0, diversity_weight=0.3,
+                 length_weight=2.0, min_length_ratio=0.8, use_bertscore=False,
+                 objective=None, bertscore_batch_size=64):
+        """
+        The default objective is
+
+            fidelity_weight * fidelity + diversity_weight * (1 - BLEU)
+            - length_weight * max(0, min_length_ratio - length_ratio)
+
+        where fidelity is BERTScore F1 when use_bertscore is set and
+        exp(sequence score) otherwise. objective may instead be any callable
+        taking a candidate's metric dict (bleu, diversity, length_ratio,
+        confidence, rank and optionally bertscore) and returning a float.
+        """
+        self.num_candidates = num_candidates
+        self.fidelity_weight = fidelity_weight
+        self.diversity_weight = diversity_weight
+        self.length_weight = length_weight
+        self.min_length_ratio = min_length_ratio
+        self.use_bertscore = use_bertscore
+        self.objective = objective or self.default_objective
+        self.bertscore_batch_size = bertscore_batch_size
+
+        self.selected = 0
+        self.reranked = 0
+
+        self._corpus = None
+        self._bertscorer = None
+
+    @property
+    def corpus(self):
+        if self._corpus is None:
+            from evaluation.corpus_metrics import CorpusEvaluator
+            self._corpus = CorpusEvaluator()
+        return self._corpus
+
+    @property
+    def bertscorer(self):
+        if self._bertscorer is None:
+            from evaluation.bertscore import BatchedBERTScorer
+            self._bertscorer = BatchedBERTScorer(lang="en", batch_size=self.bertscore_batch_size)
+        return self._bertscorer
+
+    def params(self):
+        """Settings that change the selected output, for cache keys."""
+        return {
+            "num_candidates": self.num_candidates,
+            "fidelity_weight": self.fidelity_weight,
+            "diversity_weight": self.diversity_weight,
+            "length_weight": self.length_weight,
+            "min_length_ratio": self.min_length_ratio,
+            "use_bertscore": self.use_bertscore,
+            "objective": getattr(self.objective, "__qualname__", repr(self.objective))
+        }
+
+    def default_objective(self, metrics):
+        fidelity = metrics["bertscore"] if "bertscore" in metrics else metrics["confidence"]
+        shortfall = max(0.0, self.min_length_ratio - metrics["length_ratio"])
+        return (self.fidelity_weight * fidelity
+                + self.diversity_weight * metrics["diversity"]
+                - self.length_weight * shortfall)
+
+    def score(self, sources, candidates, sequence_scores, num_candidates):
+        """
+        Metric dicts for candidates laid out as source x num_candidates.
+
+        sequence_scores are generate()'s length-normalized log-probabilities.
+        """
+        pairs = [(sources[i // num_candidates], candidate) for i, candidate in enumerate(candidates)]
+        metrics = self.corpus.evaluate(pairs)
+
+        if self.use_bertscore:
+            f1 = self.bertscorer.score([source for source, _ in pairs], candidates)
+            for result, value in zip(metrics, f1):
+                result["bertscore"] = value
+
+        for i, (result, sequence_score) in enumerate(zip(metrics, sequence_scores)):
+            result["confidence"] = math.exp(sequence_score)
+            result["rank"] = i % num_candidates
+        return metrics
+
+    def select(self, sources, candidates, sequence_scores, num_candidates):
+        """Return the best candidate for every source, in source order."""
+        metrics = self.score(sources, candidates, sequence_scores, num_candidates)
+
+        chosen = []
+        for start in range(0, len(candidates), num_candidates):
+            group = range(start, start + num_candidates)
+            best = max(group, key=lambda i: self.objective(metrics[i]))
+            chosen.append(candidates[best])
+
+            self.selected += 1
+            if best != start:
+                self.reranked += 1
+        return chosen
+
+    def stats(self):
+        """How often a candidate other than the top beam was selected."""
+        return {
+            "selected": self.selected,
+            "reranked": self.reranked,
+            "rerank_rate": self.reranked / self.selected if self.selected else 0.0
+        }
@@ -0,0 +1,204 @@
+"""
+Speculative (draft-and-verify) greedy decoding for the CPG model.
+
+A cheap drafter proposes several next tokens and the full model checks them
+all in one decoder forward pass; the longest prefix that matches the full
+model's own greedy choice is accepted, plus the full model's next token.
+The output is the same as plain greedy decoding, but each forward pass of the
+full model can produce several tokens.
+
+Two drafters are available:
+
+- PromptLookupDrafter copies the tokens that followed the latest n-gram of
+  the output in the source sentence. Paraphrases reuse long spans of their
+  input, so this needs no extra model.
+- DraftModelDrafter asks a small seq2seq model with the same vocabulary
+  (e.g. t5-small) for its greedy continuation.
+
+Sentences are decoded one at a time, so this suits latency-bound CPU use.
+"""
+import torch
+
+from models.backends import load_model
+
+
+class PromptLookupDrafter:
+    def __init__(self, ngram_size=3, num_draft_tokens=8):
+        self.ngram_size = ngram_size
+        self.num_draft_tokens = num_draft_tokens
+
+    def start(self, input_ids, attention_mask):
+        return input_ids[0].tolist()
+
+    def propose(self, source, tokens, limit):
+        """Continuation of the longest output suffix (up to ngram_size) found in source."""
+        generated = tokens[1:]
+        limit = min(limit, self.num_draft_tokens)
+
+        for size in range(min(self.ngram_size, len(generated)), 0, -1):
+            suffix = generated[-size:]
+            for start in range(len(source) - size):
+                if source[start:start + size] == suffix:
+                    return source[start + size:start + size + limit]
+        return []
+
+
+class DraftModelDrafter:
+    def __init__(self, model, num_draft_tokens=4):
+        self.model = model
+        self.num_draft_tokens = num_draft_tokens
+
+    def start(self, input_ids, attention_mask):
+        encoder_outputs = self.model.get_encoder()(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            return_dict=True
+        )
+        return encoder_outputs, attention_mask
+
+    def propose(self, state, tokens, limit):
+        encoder_outputs, attention_mask = state
+        limit = min(limit, self.num_draft_tokens)
+        if limit <= 0:
+            return []
+
+        outputs = self.model.generate(
+            encoder_outputs=encoder_outputs,
+            attention_mask=attention_mask,
+            decoder_input_ids=torch.tensor([tokens], device=attention_mask.device),
+            max_new_tokens=limit,
+            num_beams=1,
+            do_sample=False
+        )
+        return outputs[0, len(tokens):].tolist()
+
+
+def _crop_cache(past_key_values, length):
+    """Drop cached decoder self-attention positions from length onwards."""
+    if hasattr(past_key_values, "crop"):
+        past_key_values.crop(length)
+        return past_key_values
+
+    # Legacy tuples: (self key, self value, cross key, cross value) per layer
+    return tuple(
+        (layer[0][:, :, :length], layer[1][:, :, :length]) + tuple(layer[2:])
+        for layer in past_key_values
+    )
+
+
+class SpeculativeDecoder:
+    def __init__(self, model, drafter, eos_token_id, decoder_start_token_id):
+        self.model = model
+        self.drafter = drafter
+        self.eos_token_id = eos_token_id
+        self.decoder_start_token_id = decoder_start_token_id
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.drafted = 0
+        self.accepted = 0
+        self.forward_passes = 0
+        self.new_tokens = 0
+
+    def stats(self):
+        """Acceptance rate of drafted tokens and output tokens per full-model pass."""
+        return {
+            "drafted": self.drafted,
+            "accepted": self.accepted,
+            "acceptance_rate": self.accepted / self.drafted if self.drafted else 0.0,
+            "forward_passes": self.forward_passes,
+            "new_tokens": self.new_tokens,
+            "tokens_per_pass": self.new_tokens / self.forward_passes if self.forward_passes else 0.0
+        }
+
+    def generate(self, input_ids, attention_mask, min_new_tokens=0, max_new_tokens=128, force_eos=False):
+        """
+        Greedy-decode one sentence (batch of 1) with draft verification.
+
+        Returns the decoder token ids including the start token, like
+        generate(). End-of-sequence is suppressed until min_new_tokens have
+        been produced. With force_eos the last of the max_new_tokens is
+        always end-of-sequence, as with LengthWindowProcessor.
+        """
+        with torch.no_grad():
+            encoder_outputs = self.model.get_encoder()(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                return_dict=True
+            )
+            state = self.drafter.start(input_ids, attention_mask)
+
+            tokens = [self.decoder_start_token_id]
+            past_key_values = None
+            cached = 0
+            while len(tokens) - 1 < max_new_tokens:
+                # Leave room for the token the full model adds after the draft
+                draft = self.drafter.propose(state, tokens, max_new_tokens - len(tokens))
+                fed = tokens[cached:] + draft
+
+                outputs = self.model(
+                    encoder_outputs=encoder_outputs,
+                    attention_mask=attention_mask,
+                    decoder_input_ids=torch.tensor([fed], device=input_ids.device),
+                    past_key_values=past_key_values,
+                    use_cache=True,
+                    return_dict=True
+                )
+                self.forward_passes += 1
+
+                # Row i predicts the token after the last real token plus i draft tokens
+                logits = outputs.logits[0, len(fed) - len(draft) - 1:].float()
+                suppressed = min_new_tokens - (len(tokens) - 1)
+                if suppressed > 0:
+                    logits[:suppressed, self.eos_token_id] = -float("inf")
+                if force_eos:
+                    # First row that would produce the last allowed token
+                    forced = max(0, max_new_tokens - len(tokens))
+                    logits[forced:] = -float("inf")
+                    logits[forced:, self.eos_token_id] = 0.0
+                predicted = logits.argmax(-1).tolist()
+
+                accepted = 0
+                while accepted < len(draft) and draft[accepted] == predicted[accepted]:
+                    accepted += 1
+                self.drafted += len(draft)
+                self.accepted += accepted
+
+                new = draft[:accepted] + [predicted[accepted]]
+                past_key_values = _crop_cache(outputs.past_key_values, len(tokens) + accepted)
+                cached = len(tokens) + accepted
+
+                if self.eos_token_id in new:
+                    tokens += new[:new.index(self.eos_token_id) + 1]
+                    break
+                tokens += new
+
+        tokens = tokens[:max_new_tokens + 1]
+        self.new_tokens += len(tokens) - 1
+        return tokens
+
+
+def build_speculative_decoder(model, draft="prompt_lookup", device=None, local_files_only=False):
+    """
+    Wrap model in a SpeculativeDecoder.
+
+    draft is "prompt_lookup" or the name of a small seq2seq model sharing the
+    main model's vocabulary.
+    """
+    if draft == "prompt_lookup":
+        drafter = PromptLookupDrafter()
+    else:
+        draft_model = load_model(draft, "torch", device, local_files_only=local_files_only)
+        if draft_model.config.vocab_size != model.config.vocab_size:
+            raise ValueError(
+                f"Draft model '{draft}' has a vocabulary of {draft_model.config.vocab_size} tokens, "
+                f"expected {model.config.vocab_size}"
+            )
+        drafter = DraftModelDrafter(draft_model)
+
+    return SpeculativeDecoder(
+        model,
+        drafter,
+        model.config.eos_token_id,
+        model.config.decoder_start_token_id
+    )
@@ -0,0 +1,183 @@
+"""
+Multi-process CPU inference pool for the CPG model.
+
+A single torch process does not scale linearly across many cores, so the
+pool starts num_workers processes that each load the T5 model once with
+torch pinned to threads_per_worker threads. Sentences are fanned out as
+length-sorted chunks through a shared work queue and the results are
+gathered back in their original order.
+"""
+import multiprocessing as mp
+import os
+import queue
+
+from inference.preprocessing import split_sentences
+
+
+def _worker_main(model_name, num_threads, generator_kwargs, tasks, results):
+    import torch
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    from models.cpg_model import CustomParaphraseGenerator
+
+    generator = CustomParaphraseGenerator(model_name, **generator_kwargs)
+    results.put(("ready", os.getpid(), None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        task_id, sentences, min_length_ratio = task
+        try:
+            outputs = generator.paraphrase_sentences(sentences, min_length_ratio=min_length_ratio)
+            results.put((task_id, outputs, None))
+        except Exception as exc:
+            results.put((task_id, None, repr(exc)))
+
+
+class CPGWorkerPool:
+    def __init__(self, num_workers=None, threads_per_worker=1,
+                 model_name="Vamsi/T5_Paraphrase_Paws", chunk_size=8, **generator_kwargs):
+        """
+        Start the worker processes and wait until every model is loaded.
+
+        num_workers defaults to the number of CPUs divided by
+        threads_per_worker, so the two settings trade processes for
+        intra-op threads on the same core budget.
+        """
+        if num_workers is None:
+            num_workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.chunk_size = chunk_size
+        self._next_task_id = 0
+
+        context = mp.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._workers = [
+            context.Process(
+                target=_worker_main,
+                args=(model_name, threads_per_worker, generator_kwargs, self._tasks, self._results),
+                daemon=True
+            )
+            for _ in range(num_workers)
+        ]
+
+        print(f"Starting {num_workers} CPG workers x {threads_per_worker} threads...")
+        for worker in self._workers:
+            worker.start()
+
+        ready = 0
+        while ready < num_workers:
+            message, _, _ = self._get_result()
+            if message == "ready":
+                ready += 1
+
+        print("CPG worker pool ready")
+
+    def _get_result(self):
+        while True:
+            try:
+                return self._results.get(timeout=1.0)
+            except queue.Empty:
+                if any(not worker.is_alive() for worker in self._workers):
+                    self.close()
+                    raise RuntimeError("A CPG worker process exited unexpectedly")
+
+    def paraphrase_sentences(self, sentences, min_length_ratio=None):
+        """
+        Paraphrase sentences across the pool, returning them in input order.
+        """
+        if self._workers is None:
+            raise RuntimeError("CPGWorkerPool has been closed")
+
+        order = sorted(range(len(sentences)), key=lambda i: len(sentences[i]))
+
+        pending = {}
+        for start in range(0, len(order), self.chunk_size):
+            indices = order[start:start + self.chunk_size]
+            task_id = self._next_task_id
+            self._next_task_id += 1
+
+            pending[task_id] = indices
+            self._tasks.put((task_id, [sentences[i] for i in indices], min_length_ratio))
+
+        outputs = [None] * len(sentences)
+        while pending:
+            task_id, decoded, error = self._get_result()
+            if task_id not in pending:
+                continue
+            if error is not None:
+                raise RuntimeError(f"CPG worker failed: {error}")
+
+            for index, text in zip(pending.pop(task_id), decoded):
+                outputs[index] = text
+
+        return outputs
+
+    def paraphrase_paragraph(self, paragraph, min_length_ratio=0.8):
+        return " ".join(self.paraphrase_sentences(split_sentences(paragraph), min_length_ratio))
+
+    def paraphrase_documents(self, documents, max_batch_tokens=None, window_sentences=256):
+        """
+        Paraphrase an iterable of documents, yielding them in input order.
+
+        Sentences from consecutive documents are pooled until about
+        window_sentences are pending, then fanned out together.
+        max_batch_tokens is accepted for interface compatibility with
+        CustomParaphraseGenerator.paraphrase_documents.
+        """
+        pending = []
+        pending_sentences = 0
+        for document in documents:
+            sentences = split_sentences(document)
+            pending.append(sentences)
+            pending_sentences += len(sentences)
+
+            if pending_sentences >= window_sentences:
+                yield from self._flush_documents(pending)
+                pending = []
+                pending_sentences = 0
+
+        if pending:
+            yield from self._flush_documents(pending)
+
+    def _flush_documents(self, pending):
+        flat_sentences = [sentence for sentences in pending for sentence in sentences]
+        outputs = self.paraphrase_sentences(flat_sentences)
+
+        position = 0
+        for sentences in pending:
+            count = len(sentences)
+            yield " ".join(outputs[position:position + count])
+            position += count
+
+    def close(self, timeout=10.0):
+        """Stop the workers, terminating any that do not exit in time."""
+        if self._workers is None:
+            return
+
+        workers, self._workers = self._workers, None
+        for worker in workers:
+            if worker.is_alive():
+                self._tasks.put(None)
+
+        for worker in workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+        self._tasks.close()
+        self._results.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,306 @@
+"""
+Columnar, memory-mapped sharded datasets.
+
+A dataset is a directory holding a manifest.json and, for every shard, one
+file set per column:
+
+- string columns: <shard>.<column>.bin with the UTF-8 values back to back and
+  <shard>.<column>.idx.npy with rows + 1 uint64 byte offsets into it
+- numeric columns: <shard>.<column>.npy (float64 or int64)
+
+ShardWriter buffers rows and appends them as immutable shards; the manifest
+only lists a shard once all its files are written, so a crashed writer never
+leaves a half-visible shard. ShardReader memory-maps the files lazily, so a
+record is read by slicing its offsets without loading the rest of the dataset,
+and numeric columns are exposed as np.memmap arrays for vectorized queries.
+
+Usage:
+    with ShardWriter("results/", {"source": "str", "paraphrase": "str", "bleu": "float64"}) as w:
+        w.append({"source": "...", "paraphrase": "...", "bleu": 0.42})
+
+    reader = ShardReader("results/")
+    reader[10]
+    reader.select(where=lambda columns: columns["bleu"] < 0.3, columns=["source"])
+"""
+import json
+import mmap
+import os
+from bisect import bisect_right
+
+import numpy as np
+
+COLUMN_TYPES = ("str", "float64", "int64")
+MANIFEST = "manifest.json"
+
+
+def _shard_name(index):
+    return f"shard-{index:05d}"
+
+
+def _read_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(path, manifest):
+    tmp_path = os.path.join(path, MANIFEST + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, MANIFEST))
+
+
+class ShardWriter:
+    def __init__(self, path, columns, shard_size=100000):
+        """
+        Append rows to the dataset at path, creating it if needed.
+
+        columns maps column names to "str", "float64" or "int64" and must
+        match the existing manifest when appending. Rows are buffered and
+        written as one shard every shard_size rows, on flush() and on close().
+        With shard_size=None shards are only written by explicit flush() calls,
+        which lets callers align shard boundaries with their own checkpoints.
+        """
+        for name, column_type in columns.items():
+            if column_type not in COLUMN_TYPES:
+                raise ValueError(f"Column '{name}' has unknown type '{column_type}'. "
+                                 f"Choose one of: {', '.join(COLUMN_TYPES)}")
+
+        self.path = path
+        self.columns = dict(columns)
+        self.shard_size = shard_size
+
+        os.makedirs(path, exist_ok=True)
+        manifest = _read_manifest(path)
+        if manifest is None:
+            manifest = {"version": 1, "columns": self.columns, "shards": []}
+            _write_manifest(path, manifest)
+        elif manifest["columns"] != self.columns:
+            raise ValueError(f"Dataset at {path} has columns {manifest['columns']}, "
+                             f"not {self.columns}")
+        self.manifest = manifest
+
+        self._buffer = {name: [] for name in self.columns}
+        self._buffered = 0
+
+    @property
+    def rows(self):
+        """Rows written to shards so far (excluding buffered rows)."""
+        return sum(shard["rows"] for shard in self.manifest["shards"])
+
+    @property
+    def buffered(self):
+        """Rows appended but not yet written to a shard."""
+        return self._buffered
+
+    @property
+    def num_shards(self):
+        return len(self.manifest["shards"])
+
+    def append(self, record):
+        """Buffer one record; missing strings are stored empty, missing numbers as NaN/0."""
+        for name, column_type in self.columns.items():
+            value = record.get(name)
+            if column_type == "str":
+                value = "" if value is None else str(value)
+            elif value is None:
+                value = float("nan") if column_type == "float64" else 0
+            self._buffer[name].append(value)
+
+        self._buffered += 1
+        if self.shard_size and self._buffered >= self.shard_size:
+            self.flush()
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def flush(self):
+        """Write the buffered rows as a new shard and publish it in the manifest."""
+        if not self._buffered:
+            return
+
+        name = _shard_name(len(self.manifest["shards"]))
+        for column, column_type in self.columns.items():
+            values = self._buffer[column]
+            prefix = os.path.join(self.path, f"{name}.{column}")
+
+            if column_type == "str":
+                encoded = [value.encode("utf-8") for value in values]
+                offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+                np.cumsum([len(value) for value in encoded], out=offsets[1:])
+                with open(prefix + ".bin", "wb") as f:
+                    f.write(b"".join(encoded))
+                    os.fsync(f.fileno())
+                np.save(prefix + ".idx.npy", offsets)
+            else:
+                np.save(prefix + ".npy", np.asarray(values, dtype=column_type))
+
+        self.manifest["shards"].append({"name": name, "rows": self._buffered})
+        _write_manifest(self.path, self.manifest)
+
+        self._buffer = {column: [] for column in self.columns}
+        self._buffered = 0
+
+    def truncate_shards(self, num_shards):
+        """Forget shards beyond the first num_shards (used when resuming a run)."""
+        self._buffer = {column: [] for column in self.columns}
+        self._buffered = 0
+        self.manifest["shards"] = self.manifest["shards"][:num_shards]
+        _write_manifest(self.path, self.manifest)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _Shard:
+    """Lazily memory-mapped column files of one shard."""
+
+    def __init__(self, path, name, columns):
+        self.path = path
+        self.name = name
+        self.columns = columns
+        self._arrays = {}
+        self._blobs = {}
+
+    def _prefix(self, column):
+        return os.path.join(self.path, f"{self.name}.{column}")
+
+    def array(self, column):
+        """Numeric values, or string offsets, as a read-only memmap."""
+        array = self._arrays.get(column)
+        if array is None:
+            suffix = ".idx.npy" if self.columns[column] == "str" else ".npy"
+            array = self._arrays[column] = np.load(self._prefix(column) + suffix, mmap_mode="r")
+        return array
+
+    def blob(self, column):
+        blob = self._blobs.get(column)
+        if blob is None:
+            with open(self._prefix(column) + ".bin", "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    blob = memoryview(b"")
+                else:
+                    blob = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._blobs[column] = blob
+        return blob
+
+    def raw(self, column, row):
+        """Zero-copy memoryview of one string value's UTF-8 bytes."""
+        offsets = self.array(column)
+        return self.blob(column)[int(offsets[row]):int(offsets[row + 1])]
+
+    def value(self, column, row):
+        if self.columns[column] == "str":
+            return str(self.raw(column, row), "utf-8")
+        return self.array(column)[row].item()
+
+
+class ShardReader:
+    def __init__(self, path):
+        """Open the dataset at path; files are only mapped when first read."""
+        manifest = _read_manifest(path)
+        if manifest is None:
+            raise FileNotFoundError(f"No sharded dataset at {path} (missing {MANIFEST})")
+
+        self.path = path
+        self.columns = manifest["columns"]
+        self._shards = [_Shard(path, shard["name"], self.columns) for shard in manifest["shards"]]
+
+        self._starts = [0]
+        for shard in manifest["shards"]:
+            self._starts.append(self._starts[-1] + shard["rows"])
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def _locate(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"row {index} out of range for {len(self)} rows")
+        shard = bisect_right(self._starts, index) - 1
+        return self._shards[shard], index - self._starts[shard]
+
+    def __getitem__(self, index):
+        shard, row = self._locate(index)
+        return {column: shard.value(column, row) for column in self.columns}
+
+    def raw(self, index, column):
+        """Zero-copy UTF-8 bytes of a string value."""
+        shard, row = self._locate(index)
+        return shard.raw(column, row)
+
+    def iter_records(self, columns=None, start=0):
+        """Yield records (dicts of the selected columns) from row start onwards."""
+        columns = list(columns or self.columns)
+        for position, shard in enumerate(self._shards):
+            first = max(0, start - self._starts[position])
+            for row in range(first, self._starts[position + 1] - self._starts[position]):
+                yield {column: shard.value(column, row) for column in columns}
+
+    def iter_column(self, column, raw=False):
+        """Yield one column's values; raw=True yields memoryviews for string columns."""
+        for shard, rows in zip(self._shards, np.diff(self._starts)):
+            if self.columns[column] != "str":
+                yield from shard.array(column).tolist()
+            elif raw:
+                for row in range(rows):
+                    yield shard.raw(column, row)
+            else:
+                for row in range(rows):
+                    yield shard.value(column, row)
+
+    def iter_arrays(self, column):
+        """Yield the memmapped array of a numeric column, one per shard."""
+        if self.columns[column] == "str":
+            raise TypeError(f"Column '{column}' holds strings, not numbers")
+        for shard in self._shards:
+            yield shard.array(column)
+
+    def select(self, where=None, columns=None):
+        """
+        Yield (row, record) for rows matching a vectorized predicate.
+
+        where receives a dict of the numeric columns of one shard as memmapped
+        arrays and returns a boolean mask, e.g.
+        ``lambda c: (c["bleu"] < 0.3) & (c["length_ratio"] >= 0.8)``.
+        """
+        columns = list(columns or self.columns)
+        numeric = [c for c, column_type in self.columns.items() if column_type != "str"]
+
+        for position, shard in enumerate(self._shards):
+            rows = self._starts[position + 1] - self._starts[position]
+            if where is None:
+                matches = range(rows)
+            else:
+                mask = np.asarray(where({c: shard.array(c) for c in numeric}), dtype=bool)
+                matches = np.flatnonzero(mask).tolist()
+
+            for row in matches:
+                yield self._starts[position] + row, {c: shard.value(c, row) for c in columns}
+
+    def aggregate(self, column):
+        """Count, mean, min and max of a numeric column, ignoring NaN, streamed per shard."""
+        count, total = 0, 0.0
+        low, high = float("inf"), float("-inf")
+        for array in self.iter_arrays(column):
+            values = np.asarray(array, dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if len(values):
+                count += len(values)
+                total += float(values.sum())
+                low = min(low, float(values.min()))
+                high = max(high, float(values.max()))
+
+        if not count:
+            return {"count": 0, "mean": float("nan"), "min": float("nan"), "max": float("nan")}
+        return {"count": count, "mean": total / count, "min": low, "max": high}
@@ -0,0 +1,27 @@
+from evaluation.error_analysis import ErrorAnalyzer
+
+TRIPLES = [
+    ("The committee approved the new budget on Monday.",
+     "On Monday the committee passed the new budget.",
+     "The new budget got approval from the committee Monday."),
+    ("Researchers measured rainfall across several northern valleys.",
+     "Rainfall was measured by researchers in several northern valleys.",
+     "Scientists recorded rain in northern valleys."),
+    ("The library extended its opening hours during exams.",
+     "During exams the library stayed open longer.",
+     "Opening hours at the library were extended for exams exams exams."),
+]
+
+
+def test_token_table_resets_past_cap_without_changing_results():
+    expected = [ErrorAnalyzer().analyze_triple(*triple) for triple in TRIPLES]
+
+    analyzer = ErrorAnalyzer(max_tokens=5)
+    tables = []
+    results = []
+    for triple in TRIPLES:
+        results.append(analyzer.analyze_triple(*triple))
+        tables.append(analyzer._table)
+
+    assert len({id(table) for table in tables}) == len(TRIPLES)
+    assert results == expected
@@ -0,0 +1,35 @@
+import warnings
+
+from evaluation.metrics import ParaphraseEvaluator
+from storage.shards import ShardReader, ShardWriter
+
+PAIRS = [
+    ("The cat sat on the mat.", "A cat was sitting on the mat."),
+    ("It rained all day in the city.", "The city saw rain for the whole day."),
+    ("She finished the report before noon.", "The report was done by her before midday."),
+]
+
+
+def _write_requests(path):
+    columns = {"id": "str", "source": "str", "paraphrase": "str", "error": "str"}
+    with ShardWriter(path, columns, shard_size=2) as writer:
+        for index, (source, paraphrase) in enumerate(PAIRS):
+            writer.append({"id": str(index), "source": source, "paraphrase": paraphrase})
+        writer.append({"id": "failed", "source": "Broken request.", "error": "timeout"})
+
+
+def test_evaluate_store_rerun_replaces_results(tmp_path):
+    _write_requests(str(tmp_path / "requests"))
+    reader = ShardReader(str(tmp_path / "requests"))
+    output_path = str(tmp_path / "metrics")
+    evaluator = ParaphraseEvaluator()
+
+    with warnings.catch_warnings():
+        # BERTScore may be unavailable; it is reported as NaN
+        warnings.simplefilter("ignore")
+        first = evaluator.evaluate_store(reader, output_path, chunk_size=2)
+        second = evaluator.evaluate_store(reader, output_path, chunk_size=2)
+
+    assert len(ShardReader(output_path)) == len(PAIRS) + 1
+    assert first["bleu"]["count"] == second["bleu"]["count"] == len(PAIRS)
+    assert first["bleu"]["mean"] == second["bleu"]["mean"]